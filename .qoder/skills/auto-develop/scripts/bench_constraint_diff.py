@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+db_constraint_diff.py 规模基准测试
+
+用途：生成不同规模的合成 TypeScript 类型目录与 SQL schema，分别计时
+      extract_ts_union_types / extract_sql_check_constraints / find_related_pairs，
+      输出可跨运行对比的 JSON，并按阈值判定性能回归
+使用：python scripts/bench_constraint_diff.py
+      python scripts/bench_constraint_diff.py --update-baseline   # 确认当前性能后更新基线
+      python scripts/bench_constraint_diff.py --sizes 10,100,1000 --enum-values 8 --overlap 0.6
+      python scripts/bench_constraint_diff.py --baseline old.json --threshold 20   # 与指定基线对比
+
+每次结果写入 .ihs-cache/constraint-diff-bench.json；对比的基线是单独的
+.ihs-cache/constraint-diff-bench-baseline.json，只在首次运行（基线不存在）或显式
+--update-baseline 时写入，因此回归不会在重跑后被“吸收”，逐次小幅变慢也会累计到阈值。
+存在回归时退出码为 1，可作为 CI 门禁。
+"""
+
+import argparse
+import json
+import math
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+# 与 IHS 报告共享的核心模块（缓存目录）
+HARNESS_SCRIPTS = Path(__file__).resolve().parents[2] / 'ihs-repo-harness' / 'scripts'
+if str(HARNESS_SCRIPTS) not in sys.path:
+    sys.path.insert(0, str(HARNESS_SCRIPTS))
+
+from db_constraint_diff import (  # noqa: E402
+    Colors,
+    extract_sql_check_constraints,
+    extract_ts_union_types,
+    find_related_pairs,
+)
+from harness_core import CACHE_DIR  # noqa: E402
+
+BENCH_VERSION = 1
+DEFAULT_OUTPUT = CACHE_DIR / 'constraint-diff-bench.json'
+DEFAULT_BASELINE = CACHE_DIR / 'constraint-diff-bench-baseline.json'
+
+BENCH_FUNCTIONS = (
+    'extract_ts_union_types',
+    'extract_sql_check_constraints',
+    'find_related_pairs',
+)
+
+# 耗时增长同时超过百分比阈值与该绝对值（毫秒）才算回归，避免微秒级抖动误报
+REGRESSION_FLOOR_MS = 0.5
+
+# 每个 .ts 文件放多少张表的类型（真实项目按领域拆文件，而不是一个大文件）
+TABLES_PER_TS_FILE = 10
+
+
+def generate_schema(
+    tables: int,
+    checks_per_table: int,
+    enum_values: int,
+    overlap: float,
+    seed: int,
+) -> Tuple[Dict[str, str], str]:
+    """
+    生成合成 schema
+    每张表 checks_per_table 个 CHECK 约束，每个约束 enum_values 个取值；
+    对应的 TypeScript 联合类型中有 overlap 比例的取值与 SQL 相同，其余为仅 TS 存在的取值
+    返回: ({ .ts 文件名: 内容 }, setup.sql 内容)
+    """
+    rng = random.Random(seed)
+    shared = max(1, round(enum_values * overlap)) if overlap > 0 else 0
+    ts_files: Dict[str, List[str]] = {}
+    sql_lines: List[str] = []
+
+    for t in range(tables):
+        table = f'table_{t}'
+        columns = ['  id UUID PRIMARY KEY DEFAULT gen_random_uuid()']
+        ts_lines = ts_files.setdefault(f'domain_{t // TABLES_PER_TS_FILE}.ts', [])
+        for c in range(checks_per_table):
+            # 列名全局唯一：parse_sql_check_constraints 以列名为键，重名会被覆盖
+            column = f'{table}_state_{c}'
+            sql_values = [f'{column}_v{k}' for k in range(enum_values)]
+            ts_values = sql_values[:shared] + [
+                f'{column}_ts{k}' for k in range(enum_values - shared)
+            ]
+            rng.shuffle(ts_values)
+            quoted_sql = ', '.join(f"'{v}'" for v in sql_values)
+            columns.append(f'  {column} TEXT CHECK ({column} IN ({quoted_sql}))')
+            type_name = f'Table{t}State{c}'
+            union = ' | '.join(f"'{v}'" for v in ts_values)
+            ts_lines.append(f'export type {type_name} = {union}')
+        sql_lines.append(f'CREATE TABLE IF NOT EXISTS public.{table} (')
+        sql_lines.append(',\n'.join(columns))
+        sql_lines.append(');')
+        sql_lines.append('')
+
+    contents = {name: '\n'.join(lines) + '\n' for name, lines in ts_files.items()}
+    return contents, '\n'.join(sql_lines)
+
+
+def time_call(fn: Callable[[], object], repeat: int) -> Tuple[Dict[str, float], object]:
+    """执行 repeat 次，返回 ({median_ms, min_ms}, 最后一次的返回值)"""
+    samples = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return {
+        'median_ms': round(statistics.median(samples), 3),
+        'min_ms': round(min(samples), 3),
+    }, result
+
+
+def bench_size(
+    tables: int,
+    checks_per_table: int,
+    enum_values: int,
+    overlap: float,
+    repeat: int,
+    seed: int,
+) -> Dict[str, object]:
+    ts_contents, sql_content = generate_schema(tables, checks_per_table, enum_values, overlap, seed)
+    with tempfile.TemporaryDirectory(prefix='constraint-bench-') as tmp:
+        types_dir = Path(tmp) / 'types'
+        types_dir.mkdir()
+        for name, content in ts_contents.items():
+            (types_dir / name).write_text(content, encoding='utf-8')
+        setup_sql = Path(tmp) / 'setup.sql'
+        setup_sql.write_text(sql_content, encoding='utf-8')
+
+        # 不传 tree：与独立运行脚本一致，每次都重新遍历目录并读取文件
+        ts_timing, ts_types = time_call(lambda: extract_ts_union_types(types_dir), repeat)
+        sql_timing, sql_constraints = time_call(
+            lambda: extract_sql_check_constraints(setup_sql), repeat
+        )
+        pairs_timing, pairs = time_call(
+            lambda: find_related_pairs(ts_types, sql_constraints), repeat
+        )
+
+    return {
+        'tables': tables,
+        'checks_per_table': checks_per_table,
+        'enum_values': enum_values,
+        'overlap': overlap,
+        'ts_files': len(ts_contents),
+        'ts_bytes': sum(len(c.encode('utf-8')) for c in ts_contents.values()),
+        'sql_bytes': len(sql_content.encode('utf-8')),
+        'ts_types': len(ts_types),
+        'sql_constraints': len(sql_constraints),
+        'pairs': len(pairs),
+        'timings': {
+            'extract_ts_union_types': ts_timing,
+            'extract_sql_check_constraints': sql_timing,
+            'find_related_pairs': pairs_timing,
+        },
+    }
+
+
+def scaling_exponents(results: List[Dict[str, object]]) -> Dict[str, Optional[float]]:
+    """
+    对 log(表数) 与 log(耗时中位数) 做最小二乘拟合，斜率即增长阶数（1 ≈ 线性，2 ≈ 平方）
+    少于两个规模或耗时为 0 时返回 None
+    """
+    exponents: Dict[str, Optional[float]] = {}
+    for name in BENCH_FUNCTIONS:
+        points = [
+            (math.log(r['tables']), math.log(r['timings'][name]['median_ms']))
+            for r in results
+            if r['tables'] > 0 and r['timings'][name]['median_ms'] > 0
+        ]
+        if len(points) < 2:
+            exponents[name] = None
+            continue
+        mean_x = statistics.mean(x for x, _ in points)
+        mean_y = statistics.mean(y for _, y in points)
+        var_x = sum((x - mean_x) ** 2 for x, _ in points)
+        if var_x == 0:
+            exponents[name] = None
+            continue
+        cov = sum((x - mean_x) * (y - mean_y) for x, y in points)
+        exponents[name] = round(cov / var_x, 2)
+    return exponents
+
+
+def result_key(result: Dict[str, object]) -> Tuple[object, ...]:
+    """只有生成参数完全相同的结果才可比"""
+    return (
+        result['tables'],
+        result['checks_per_table'],
+        result['enum_values'],
+        result['overlap'],
+    )
+
+
+def find_regressions(
+    baseline: Dict[str, object], current: Dict[str, object], threshold_pct: float
+) -> Tuple[List[Dict[str, object]], int]:
+    """
+    按 (规模, 函数) 对比耗时中位数
+    返回: (回归列表, 参与对比的项数)
+    """
+    previous = {result_key(r): r for r in baseline.get('results', [])}
+    regressions = []
+    compared = 0
+    for result in current['results']:
+        before = previous.get(result_key(result))
+        if before is None:
+            continue
+        for name in BENCH_FUNCTIONS:
+            old_ms = before['timings'].get(name, {}).get('median_ms')
+            new_ms = result['timings'][name]['median_ms']
+            if not old_ms:
+                continue
+            compared += 1
+            growth_pct = (new_ms - old_ms) / old_ms * 100
+            if growth_pct > threshold_pct and new_ms - old_ms > REGRESSION_FLOOR_MS:
+                regressions.append({
+                    'tables': result['tables'],
+                    'function': name,
+                    'baseline_ms': old_ms,
+                    'current_ms': new_ms,
+                    'growth_pct': round(growth_pct, 1),
+                })
+    return regressions, compared
+
+
+def load_baseline(path: Path) -> Optional[Dict[str, object]]:
+    try:
+        data = json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, json.JSONDecodeError):
+        return None
+    if not isinstance(data, dict) or data.get('version') != BENCH_VERSION:
+        return None
+    return data
+
+
+def print_results(payload: Dict[str, object]) -> None:
+    print(f"\n{Colors.BLUE}=== db_constraint_diff 规模基准 ==={Colors.NC}\n")
+    header = f"{'表数':>6} {'类型':>6} {'约束':>6} {'配对':>6}"
+    for name in BENCH_FUNCTIONS:
+        header += f" {name:>30}"
+    print(header)
+    for result in payload['results']:
+        row = (
+            f"{result['tables']:>8} {result['ts_types']:>8} "
+            f"{result['sql_constraints']:>8} {result['pairs']:>8}"
+        )
+        for name in BENCH_FUNCTIONS:
+            row += f" {result['timings'][name]['median_ms']:>27.3f}ms"
+        print(row)
+
+    print("\n增长阶数（log-log 斜率，1≈线性，2≈平方）:")
+    for name, exponent in payload['scaling_exponents'].items():
+        print(f"  {name}: {exponent if exponent is not None else '-'}")
+
+
+def parse_sizes(text: str) -> List[int]:
+    try:
+        sizes = sorted({int(part) for part in text.split(',') if part.strip()})
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"无效的规模列表: {text}")
+    if not sizes or sizes[0] <= 0:
+        raise argparse.ArgumentTypeError(f"规模必须为正整数: {text}")
+    return sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="db_constraint_diff.py 规模基准测试")
+    parser.add_argument(
+        "--sizes",
+        type=parse_sizes,
+        default=parse_sizes("10,50,200,1000"),
+        help="逗号分隔的表数量列表（默认 10,50,200,1000）",
+    )
+    parser.add_argument("--checks-per-table", type=int, default=2, help="每张表的 CHECK 约束数（默认 2）")
+    parser.add_argument("--enum-values", type=int, default=5, help="每个约束的枚举取值数（默认 5）")
+    parser.add_argument(
+        "--overlap",
+        type=float,
+        default=0.8,
+        help="TypeScript 联合类型与 SQL 约束相同取值的比例，0~1（默认 0.8）",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="每个函数的重复次数，取中位数（默认 5）")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子（默认 0）")
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=DEFAULT_OUTPUT,
+        help=f"结果 JSON 路径（默认 {DEFAULT_OUTPUT}）",
+    )
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        default=DEFAULT_BASELINE,
+        help=f"对比的基线 JSON（默认 {DEFAULT_BASELINE}）",
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="用本次结果覆盖基线（基线不存在时会自动写入）",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=25.0,
+        help="耗时中位数增长超过该百分比即判定为回归（默认 25）",
+    )
+    args = parser.parse_args()
+
+    if not 0 <= args.overlap <= 1:
+        parser.error("--overlap 必须在 0~1 之间")
+    if args.enum_values < 1 or args.checks_per_table < 1 or args.repeat < 1:
+        parser.error("--enum-values / --checks-per-table / --repeat 必须为正整数")
+
+    baseline = load_baseline(args.baseline)
+
+    results = []
+    for tables in args.sizes:
+        results.append(bench_size(
+            tables, args.checks_per_table, args.enum_values, args.overlap, args.repeat, args.seed
+        ))
+
+    payload: Dict[str, object] = {
+        'version': BENCH_VERSION,
+        'created_at': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'seed': args.seed,
+        'results': results,
+        'scaling_exponents': scaling_exponents(results),
+    }
+    print_results(payload)
+
+    regressions: List[Dict[str, object]] = []
+    if baseline is not None:
+        regressions, compared = find_regressions(baseline, payload, args.threshold)
+        payload['comparison'] = {
+            'baseline_created_at': baseline.get('created_at'),
+            'threshold_pct': args.threshold,
+            'compared': compared,
+            'regressions': regressions,
+        }
+        print(f"\n对比基线（{baseline.get('created_at')}，共 {compared} 项）:")
+        if regressions:
+            for item in regressions:
+                print(
+                    f"  {Colors.RED}❌ {item['function']} @ {item['tables']} 表: "
+                    f"{item['baseline_ms']}ms → {item['current_ms']}ms (+{item['growth_pct']}%){Colors.NC}"
+                )
+        else:
+            print(f"  {Colors.GREEN}✓ 无超过 {args.threshold}% 的回归{Colors.NC}")
+
+    text = json.dumps(payload, ensure_ascii=False, indent=2)
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(text, encoding='utf-8')
+    print(f"\n结果已写入: {args.output}")
+    if args.update_baseline or baseline is None:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(text, encoding='utf-8')
+        print(f"基线已更新: {args.baseline}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,18 +4,74 @@ Photo Wall 数据库一致性检查工具
 
 用途：对比 TypeScript 类型定义与 SQL CHECK 约束，发现不一致问题
 使用：python scripts/db_constraint_diff.py
+      python scripts/db_constraint_diff.py --watch   # 监听模式，文件变更后增量重检
+      python scripts/db_constraint_diff.py --perf-lint [--json]   # setup.sql 性能检查（CI 门禁）
 
 检查项：
 1. TypeScript 联合类型（如 'private' | 'organization' | 'public'）
 2. SQL CHECK 约束（如 visibility IN ('private', 'organization')）
 3. 输出差异报告
+
+性能检查项（--perf-lint）：
+1. RLS 策略中逐行求值的 auth.uid() 等函数调用
+2. RLS 策略（含子查询）按无索引列过滤
+3. 没有覆盖索引的外键
 """
 
+import argparse
+import ctypes
+import ctypes.util
+import json
 import os
 import re
+import select
+import struct
 import sys
+import time
 from pathlib import Path
-from typing import Dict, List, Set, Tuple
+from typing import Dict, List, Optional, Set, Tuple
+
+# 与 IHS 报告共享的核心模块（项目根定位、目录遍历、文件内容缓存、setup.sql 解析）
+HARNESS_SCRIPTS = Path(__file__).resolve().parents[2] / 'ihs-repo-harness' / 'scripts'
+if str(HARNESS_SCRIPTS) not in sys.path:
+    sys.path.insert(0, str(HARNESS_SCRIPTS))
+
+from harness_core import (  # noqa: E402
+    SQL_TABLE_NAME,
+    RepoTree,
+    SqlPolicy,
+    SqlSchema,
+    find_app_root,
+    find_closing_paren,
+    line_of,
+    mask_sql_comments,
+    normalize_table_name,
+    parse_sql_schema,
+)
+
+# 匹配 type X = 'a' | 'b' | 'c' 形式
+TS_UNION_PATTERN = re.compile(
+    r"export\s+type\s+(\w+)\s*=\s*(['\"][^'\"]+['\"](?:\s*\|\s*['\"][^'\"]+['\"])+)"
+)
+
+# 匹配 CHECK (column IN ('a', 'b', 'c')) 形式
+# 也匹配 CONSTRAINT xxx CHECK (...)
+SQL_CHECK_PATTERN = re.compile(
+    r"(?:CONSTRAINT\s+(\w+)\s+)?CHECK\s*\(\s*(\w+)\s+IN\s*\(([^)]+)\)",
+    re.IGNORECASE,
+)
+
+STRING_VALUE_PATTERN = re.compile(r"['\"]([^'\"]+)['\"]")
+
+# 常见的命名映射
+NAME_MAPPINGS = {
+    'AlbumVisibility': 'visibility',
+    'PhotoVisibility': 'visibility',
+    'PersonStatus': 'status',
+    'AlbumStatus': 'status',
+    'TaskStatus': 'status',
+    'SyncStatus': 'sync_status',
+}
 
 # 颜色输出
 class Colors:
@@ -27,62 +83,87 @@ class Colors:
 
 
 def find_project_root() -> Path:
-    """找到项目根目录（包含 photo-wall 的目录）"""
-    script_dir = Path(__file__).parent.resolve()
-    # 从 .qoder/skills/auto-develop/scripts 向上找
-    current = script_dir
-    for _ in range(10):
-        if (current / 'photo-wall').exists():
-            return current
-        current = current.parent
-    raise RuntimeError("无法找到项目根目录")
+    """找到项目根目录（包含 app/ 或旧版 photo-wall/ 的目录）"""
+    return find_app_root().parent
+
 
+def resolve_paths() -> Tuple[Path, Path]:
+    """定位 types 目录与 setup.sql，缺失时抛出 RuntimeError"""
+    app_root = find_app_root()
+    types_dir = app_root / 'src' / 'types'
+    setup_sql = app_root / 'supabase' / 'setup.sql'
+    
+    if not types_dir.exists():
+        raise RuntimeError(f"找不到 types 目录: {types_dir}")
+    if not setup_sql.exists():
+        raise RuntimeError(f"找不到 setup.sql: {setup_sql}")
+    return types_dir, setup_sql
 
-def extract_ts_union_types(types_dir: Path) -> Dict[str, Tuple[str, Set[str]]]:
+
+def parse_ts_union_types(content: str, file_label: str) -> Dict[str, Tuple[str, Set[str]]]:
+    """
+    从单个 TypeScript 文件内容中提取联合类型
+    返回: { 类型名: (文件路径, {值1, 值2, ...}) }
+    """
+    union_types = {}
+    for match in TS_UNION_PATTERN.finditer(content):
+        type_name = match.group(1)
+        values_str = match.group(2)
+        # 提取所有字符串值
+        values = set(STRING_VALUE_PATTERN.findall(values_str))
+        union_types[type_name] = (file_label, values)
+    return union_types
+
+
+def extract_ts_union_types(
+    types_dir: Path, tree: Optional[RepoTree] = None
+) -> Dict[str, Tuple[str, Set[str]]]:
     """
     从 TypeScript 类型文件中提取联合类型
     返回: { 类型名: (文件路径, {值1, 值2, ...}) }
     """
+    tree = tree or RepoTree(types_dir)
     union_types = {}
     
-    # 匹配 type X = 'a' | 'b' | 'c' 形式
-    pattern = r"export\s+type\s+(\w+)\s*=\s*(['\"][^'\"]+['\"](?:\s*\|\s*['\"][^'\"]+['\"])+)"
-    
-    for ts_file in types_dir.glob("*.ts"):
-        content = ts_file.read_text(encoding='utf-8')
-        for match in re.finditer(pattern, content):
-            type_name = match.group(1)
-            values_str = match.group(2)
-            # 提取所有字符串值
-            values = set(re.findall(r"['\"]([^'\"]+)['\"]", values_str))
-            union_types[type_name] = (str(ts_file), values)
+    for ts_file in tree.files(types_dir, {'.ts'}, recursive=False):
+        content = tree.read_text(ts_file)
+        if content is None:
+            continue
+        union_types.update(parse_ts_union_types(content, str(ts_file)))
     
     return union_types
 
 
-def extract_sql_check_constraints(setup_sql: Path) -> Dict[str, Tuple[str, Set[str]]]:
+def parse_sql_check_constraints(content: str) -> Dict[str, Tuple[str, Set[str]]]:
     """
-    从 SQL 文件中提取 CHECK 约束
+    从 SQL 内容中提取 CHECK 约束
     返回: { 列名: (约束名, {值1, 值2, ...}) }
     """
     constraints = {}
-    content = setup_sql.read_text(encoding='utf-8')
-    
-    # 匹配 CHECK (column IN ('a', 'b', 'c')) 形式
-    # 也匹配 CONSTRAINT xxx CHECK (...)
-    pattern = r"(?:CONSTRAINT\s+(\w+)\s+)?CHECK\s*\(\s*(\w+)\s+IN\s*\(([^)]+)\)"
-    
-    for match in re.finditer(pattern, content, re.IGNORECASE):
+    for match in SQL_CHECK_PATTERN.finditer(content):
         constraint_name = match.group(1) or f"inline_{match.group(2)}"
         column_name = match.group(2)
         values_str = match.group(3)
         # 提取所有字符串值
-        values = set(re.findall(r"['\"]([^'\"]+)['\"]", values_str))
+        values = set(STRING_VALUE_PATTERN.findall(values_str))
         constraints[column_name] = (constraint_name, values)
-    
     return constraints
 
 
+def extract_sql_check_constraints(
+    setup_sql: Path, tree: Optional[RepoTree] = None
+) -> Dict[str, Tuple[str, Set[str]]]:
+    """
+    从 SQL 文件中提取 CHECK 约束
+    返回: { 列名: (约束名, {值1, 值2, ...}) }
+    """
+    if tree is not None:
+        content = tree.read_text(setup_sql) or ''
+    else:
+        content = setup_sql.read_text(encoding='utf-8')
+    return parse_sql_check_constraints(content)
+
+
 def find_related_pairs(
     ts_types: Dict[str, Tuple[str, Set[str]]], 
     sql_constraints: Dict[str, Tuple[str, Set[str]]]
@@ -92,35 +173,37 @@ def find_related_pairs(
     返回: [(ts_type_name, sql_column_name, relation_type), ...]
     """
     pairs = []
-    
-    # 常见的命名映射
-    name_mappings = {
-        'AlbumVisibility': 'visibility',
-        'PhotoVisibility': 'visibility',
-        'PersonStatus': 'status',
-        'AlbumStatus': 'status',
-        'TaskStatus': 'status',
-        'SyncStatus': 'sync_status',
-    }
-    
     for ts_name, (_, ts_values) in ts_types.items():
-        # 直接映射
-        if ts_name in name_mappings:
-            sql_col = name_mappings[ts_name]
-            if sql_col in sql_constraints:
-                pairs.append((ts_name, sql_col, 'direct_mapping'))
-                continue
-        
-        # 基于值的模糊匹配
-        for sql_col, (_, sql_values) in sql_constraints.items():
-            # 如果有超过一半的值相同，认为是相关的
-            common = ts_values & sql_values
-            if len(common) >= len(ts_values) * 0.5 or len(common) >= len(sql_values) * 0.5:
-                pairs.append((ts_name, sql_col, 'value_overlap'))
+        pairs.extend(find_pairs_for_type(ts_name, ts_values, sql_constraints))
+    return pairs
+
+
+def find_pairs_for_type(
+    ts_name: str,
+    ts_values: Set[str],
+    sql_constraints: Dict[str, Tuple[str, Set[str]]]
+) -> List[Tuple[str, str, str]]:
+    """查找单个 TypeScript 类型相关的 SQL 约束对（find_related_pairs 的单类型版本）"""
+    # 直接映射
+    if ts_name in NAME_MAPPINGS:
+        sql_col = NAME_MAPPINGS[ts_name]
+        if sql_col in sql_constraints:
+            return [(ts_name, sql_col, 'direct_mapping')]
     
+    pairs = []
+    # 基于值的模糊匹配
+    for sql_col, (_, sql_values) in sql_constraints.items():
+        if values_overlap(ts_values, sql_values):
+            pairs.append((ts_name, sql_col, 'value_overlap'))
     return pairs
 
 
+def values_overlap(ts_values: Set[str], sql_values: Set[str]) -> bool:
+    """如果有超过一半的值相同，认为是相关的"""
+    common = ts_values & sql_values
+    return len(common) >= len(ts_values) * 0.5 or len(common) >= len(sql_values) * 0.5
+
+
 def compare_and_report(
     ts_types: Dict[str, Tuple[str, Set[str]]], 
     sql_constraints: Dict[str, Tuple[str, Set[str]]],
@@ -137,62 +220,590 @@ def compare_and_report(
         return False
     
     for ts_name, sql_col, relation in pairs:
-        ts_file, ts_values = ts_types[ts_name]
-        constraint_name, sql_values = sql_constraints[sql_col]
-        
-        print(f"{Colors.BLUE}[{ts_name}] ↔ [{sql_col}]{Colors.NC}")
-        print(f"  TypeScript: {ts_file}")
-        print(f"  SQL 约束:   {constraint_name}")
-        
-        # 找出差异
-        only_in_ts = ts_values - sql_values
-        only_in_sql = sql_values - ts_values
-        
-        if only_in_ts or only_in_sql:
+        if report_pair(ts_types, sql_constraints, ts_name, sql_col):
             has_diff = True
-            print(f"  {Colors.RED}❌ 发现差异{Colors.NC}")
-            if only_in_ts:
-                print(f"     仅在 TypeScript: {Colors.YELLOW}{only_in_ts}{Colors.NC}")
-                print(f"     → 需要在 setup.sql 中添加这些值到 CHECK 约束")
-            if only_in_sql:
-                print(f"     仅在 SQL:        {Colors.YELLOW}{only_in_sql}{Colors.NC}")
-                print(f"     → 需要在 TypeScript 类型中添加这些值")
-        else:
-            print(f"  {Colors.GREEN}✓ 一致{Colors.NC}")
-            print(f"     共同值: {ts_values}")
-        
-        print()
     
     return has_diff
 
 
-def main():
-    try:
-        project_root = find_project_root()
-    except RuntimeError as e:
-        print(f"{Colors.RED}错误: {e}{Colors.NC}")
-        sys.exit(1)
+def report_pair(
+    ts_types: Dict[str, Tuple[str, Set[str]]],
+    sql_constraints: Dict[str, Tuple[str, Set[str]]],
+    ts_name: str,
+    sql_col: str
+) -> bool:
+    """输出单个类型-约束对的比较结果，返回是否有差异"""
+    ts_file, ts_values = ts_types[ts_name]
+    constraint_name, sql_values = sql_constraints[sql_col]
     
-    photo_wall = project_root / 'photo-wall'
-    types_dir = photo_wall / 'src' / 'types'
-    setup_sql = photo_wall / 'supabase' / 'setup.sql'
+    print(f"{Colors.BLUE}[{ts_name}] ↔ [{sql_col}]{Colors.NC}")
+    print(f"  TypeScript: {ts_file}")
+    print(f"  SQL 约束:   {constraint_name}")
     
-    # 检查文件存在
-    if not types_dir.exists():
-        print(f"{Colors.RED}错误: 找不到 types 目录: {types_dir}{Colors.NC}")
-        sys.exit(1)
+    # 找出差异
+    only_in_ts = ts_values - sql_values
+    only_in_sql = sql_values - ts_values
     
-    if not setup_sql.exists():
-        print(f"{Colors.RED}错误: 找不到 setup.sql: {setup_sql}{Colors.NC}")
-        sys.exit(1)
+    if only_in_ts or only_in_sql:
+        print(f"  {Colors.RED}❌ 发现差异{Colors.NC}")
+        if only_in_ts:
+            print(f"     仅在 TypeScript: {Colors.YELLOW}{only_in_ts}{Colors.NC}")
+            print(f"     → 需要在 setup.sql 中添加这些值到 CHECK 约束")
+        if only_in_sql:
+            print(f"     仅在 SQL:        {Colors.YELLOW}{only_in_sql}{Colors.NC}")
+            print(f"     → 需要在 TypeScript 类型中添加这些值")
+    else:
+        print(f"  {Colors.GREEN}✓ 一致{Colors.NC}")
+        print(f"     共同值: {ts_values}")
     
-    print(f"项目根目录: {project_root}")
+    print()
+    return bool(only_in_ts or only_in_sql)
+
+
+# ---------------------------------------------------------------------------
+# 性能检查（--perf-lint）：RLS 策略中的逐行函数调用、未建索引的策略列与外键
+# ---------------------------------------------------------------------------
+
+# 每行都会重新求值的函数；包成 (select auth.uid()) 后 Postgres 只在 InitPlan 中求值一次
+PER_ROW_CALL_PATTERN = re.compile(
+    r"\b(auth\.(?:uid|jwt|role|email)|current_setting)\s*\(", re.IGNORECASE
+)
+WRAPPED_CALL_PREFIX = re.compile(r"\(\s*SELECT\s+$", re.IGNORECASE)
+
+SUBQUERY_START_PATTERN = re.compile(r"\(\s*SELECT\b", re.IGNORECASE)
+SUBQUERY_FROM_PATTERN = re.compile(
+    r"\bFROM\s+" + SQL_TABLE_NAME + r"(\s*\()?(?:\s+(?:AS\s+)?(?!WHERE\b)(\w+))?",
+    re.IGNORECASE,
+)
+SUBQUERY_WHERE_PATTERN = re.compile(r"\bWHERE\b", re.IGNORECASE)
+
+# 谓词中的列引用：[schema.][table.]column，后面不跟 "("（排除函数调用）
+COLUMN_REF_PATTERN = re.compile(r'(?<![\w.])((?:\w+\.){0,2}\w+)(?![\w.]|\s*\()')
+
+SQL_KEYWORDS = {
+    'and', 'or', 'not', 'in', 'is', 'null', 'true', 'false', 'select', 'from',
+    'where', 'exists', 'any', 'all', 'like', 'ilike', 'between', 'as', 'case',
+    'when', 'then', 'else', 'end', 'distinct', 'limit', 'join', 'on',
+}
+
+PERF_RULES = {
+    'per_row_function_call': 'warning',
+    'unindexed_policy_column': 'error',
+    'unindexed_foreign_key': 'warning',
+}
+
+SEVERITY_ORDER = {'warning': 1, 'error': 2}
+
+
+def split_subqueries(expression: str) -> Tuple[str, List[Tuple[str, int]]]:
+    """
+    拆出表达式中最外层的 (SELECT ...) 子查询
+    返回: (子查询替换为空白后的外层表达式, [(子查询文本, 相对偏移), ...])
+    """
+    outer = list(expression)
+    subqueries = []
+    position = 0
+    while True:
+        match = SUBQUERY_START_PATTERN.search(expression, position)
+        if not match:
+            break
+        close_index = find_closing_paren(expression, match.start())
+        subqueries.append((expression[match.start() + 1:close_index], match.start() + 1))
+        for i in range(match.start(), min(close_index + 1, len(outer))):
+            if outer[i] != '\n':
+                outer[i] = ' '
+        position = close_index + 1
+    return ''.join(outer), subqueries
+
+
+def referenced_columns(predicate: str, table: str, aliases: Set[str]) -> List[str]:
+    """
+    谓词中引用到 table 的列：不带限定名的列，或以 table / 别名限定的列
+    以其他表限定的列（关联子查询中的外层行）不计入
+    """
+    predicate = re.sub(r"'(?:[^']|'')*'", ' ', predicate)
+    columns = []
+    for ref in COLUMN_REF_PATTERN.findall(predicate):
+        parts = ref.lower().split('.')
+        column = parts[-1]
+        if column in SQL_KEYWORDS or column.isdigit():
+            continue
+        qualifier = '.'.join(parts[:-1])
+        if qualifier and normalize_table_name(qualifier) != table and qualifier not in aliases:
+            continue
+        if column not in columns:
+            columns.append(column)
+    return columns
+
+
+def qualified_table_name(table: str) -> str:
+    """建议语句中的表名：未带 schema 的表补上 public，storage.objects 等保持原样"""
+    return table if '.' in table else f'public.{table}'
+
+
+def lint_policy_expression(
+    schema: SqlSchema,
+    policy: SqlPolicy,
+    clause: str,
+    expression: str,
+    offset: int,
+    content: str,
+) -> List[Dict[str, object]]:
+    findings = []
+
+    for call in PER_ROW_CALL_PATTERN.finditer(expression):
+        if WRAPPED_CALL_PREFIX.search(expression[:call.start()]):
+            continue
+        function = call.group(1).lower()
+        findings.append(perf_finding(
+            'per_row_function_call', policy.table, line_of(content, offset + call.start()),
+            f"策略 {policy.name} 的 {clause} 子句直接调用 {function}()，会按行重复求值",
+            f"改写为 (select {function}())，让 Postgres 只求值一次",
+            policy=policy.name, function=f'{function}()',
+        ))
+
+    outer, subqueries = split_subqueries(expression)
+    # 只检查 setup.sql 中声明的表；storage.objects 等平台表的索引不在本文件中
+    if policy.table in schema.tables:
+        outer_columns = referenced_columns(outer, policy.table, set())
+        unindexed = [c for c in outer_columns if not schema.leading_index(policy.table, (c,))]
+        if outer_columns and len(unindexed) == len(outer_columns):
+            findings.append(perf_finding(
+                'unindexed_policy_column', policy.table, line_of(content, offset),
+                f"策略 {policy.name} 的 {clause} 子句按 {policy.table}({', '.join(unindexed)}) 过滤，但这些列均无索引",
+                f"CREATE INDEX ON {qualified_table_name(policy.table)} ({unindexed[0]});",
+                policy=policy.name, columns=unindexed,
+            ))
+
+    for subquery, sub_offset in subqueries:
+        findings.extend(lint_policy_subquery(schema, policy, clause, subquery, offset + sub_offset, content))
+    return findings
+
+
+def lint_policy_subquery(
+    schema: SqlSchema,
+    policy: SqlPolicy,
+    clause: str,
+    subquery: str,
+    offset: int,
+    content: str,
+) -> List[Dict[str, object]]:
+    """子查询 FROM 的表上，WHERE 中用到的列至少有一列是某个索引的前导列，否则每行都要全表扫描"""
+    inner, nested = split_subqueries(subquery)
+    findings = []
+    for nested_query, nested_offset in nested:
+        findings.extend(lint_policy_subquery(schema, policy, clause, nested_query, offset + nested_offset, content))
+
+    source = SUBQUERY_FROM_PATTERN.search(inner)
+    where = SUBQUERY_WHERE_PATTERN.search(inner)
+    # FROM 后是函数调用（如 get_user_accessible_organizations(...)）时无法判断索引
+    if not source or source.group(2) or not where:
+        return findings
+    table = normalize_table_name(source.group(1))
+    if table not in schema.tables:
+        return findings
+    aliases = {source.group(3).lower()} if source.group(3) else set()
+    columns = referenced_columns(inner[where.end():], table, aliases)
+    if columns and not any(schema.leading_index(table, (c,)) for c in columns):
+        findings.append(perf_finding(
+            'unindexed_policy_column', table, line_of(content, offset),
+            f"策略 {policy.name} 的 {clause} 子查询按 {table}({', '.join(columns)}) 过滤，但这些列均无索引",
+            f"CREATE INDEX ON {qualified_table_name(table)} ({columns[0]});",
+            policy=policy.name, columns=columns,
+        ))
+    return findings
+
+
+def perf_finding(
+    rule: str, table: str, line: int, message: str, suggestion: str, **extra: object
+) -> Dict[str, object]:
+    finding: Dict[str, object] = {
+        'rule': rule,
+        'severity': PERF_RULES[rule],
+        'table': table,
+        'line': line,
+    }
+    finding.update(extra)
+    finding['message'] = message
+    finding['suggestion'] = suggestion
+    return finding
+
+
+def lint_sql_performance(content: str) -> Tuple[SqlSchema, List[Dict[str, object]]]:
+    """
+    对 setup.sql 做性能检查，返回 (解析出的 schema, 问题列表)
+    规则：
+    1. per_row_function_call   策略中未包成 (select ...) 的 auth.*() / current_setting() 调用
+    2. unindexed_policy_column 策略（含子查询）过滤的列没有可用索引
+    3. unindexed_foreign_key   外键列不是任何索引的前导列（删除 / 更新被引用行时全表扫描）
+    """
+    masked = mask_sql_comments(content)
+    schema = parse_sql_schema(content)
+    findings = []
+
+    for policy in schema.policies:
+        for clause, expression, offset in policy.clauses:
+            findings.extend(lint_policy_expression(schema, policy, clause, expression, offset, masked))
+
+    for fk in schema.foreign_keys:
+        if fk.columns and not schema.leading_index(fk.table, fk.columns):
+            columns = ', '.join(fk.columns)
+            findings.append(perf_finding(
+                'unindexed_foreign_key', fk.table, fk.line,
+                f"外键 {fk.table}({columns}) → {fk.references} 没有覆盖索引",
+                f"CREATE INDEX IF NOT EXISTS idx_{fk.table.replace('.', '_')}_{'_'.join(fk.columns)} "
+                f"ON {qualified_table_name(fk.table)}({columns});",
+                columns=list(fk.columns), references=fk.references,
+            ))
+
+    findings.sort(key=lambda f: (f['line'], f['rule']))
+    return schema, findings
+
+
+def perf_lint_payload(setup_sql: Path, schema: SqlSchema, findings: List[Dict[str, object]]) -> Dict[str, object]:
+    by_rule = {rule: 0 for rule in PERF_RULES}
+    for finding in findings:
+        by_rule[finding['rule']] += 1
+    try:
+        file_label = setup_sql.relative_to(find_project_root()).as_posix()
+    except ValueError:
+        file_label = str(setup_sql)
+    return {
+        'file': file_label,
+        'summary': {
+            'tables': len(schema.tables),
+            'indexes': sum(len(indexes) for indexes in schema.indexes.values()),
+            'foreign_keys': len(schema.foreign_keys),
+            'policies': len(schema.policies),
+            'findings': len(findings),
+            'by_rule': by_rule,
+        },
+        'findings': findings,
+    }
+
+
+def report_perf_findings(payload: Dict[str, object]) -> None:
+    summary = payload['summary']
+    print(f"\n{Colors.BLUE}=== setup.sql 性能检查 ==={Colors.NC}\n")
+    print(
+        f"表 {summary['tables']} 个，索引 {summary['indexes']} 个（含主键 / UNIQUE），"
+        f"外键 {summary['foreign_keys']} 个，RLS 策略 {summary['policies']} 条\n"
+    )
+    for finding in payload['findings']:
+        color = Colors.RED if finding['severity'] == 'error' else Colors.YELLOW
+        print(f"{color}[{finding['severity']}] {finding['rule']}{Colors.NC}  {payload['file']}:{finding['line']}")
+        print(f"  {finding['message']}")
+        print(f"  → {finding['suggestion']}")
+    if payload['findings']:
+        counts = '，'.join(f"{rule} {count}" for rule, count in summary['by_rule'].items() if count)
+        print(f"\n共 {summary['findings']} 个问题：{counts}")
+    else:
+        print(f"{Colors.GREEN}✓ 未发现性能问题{Colors.NC}")
+
+
+def run_perf_lint(
+    tree: Optional[RepoTree] = None, as_json: bool = False, fail_on: str = 'warning'
+) -> bool:
+    """
+    执行 setup.sql 性能检查；as_json 时只向 stdout 输出 JSON
+    返回是否存在严重级别不低于 fail_on 的问题（fail_on='none' 时恒为 False）
+    """
+    _, setup_sql = resolve_paths()
+    if tree is not None:
+        content = tree.read_text(setup_sql) or ''
+    else:
+        content = setup_sql.read_text(encoding='utf-8')
+    schema, findings = lint_sql_performance(content)
+    payload = perf_lint_payload(setup_sql, schema, findings)
+
+    if as_json:
+        print(json.dumps(payload, ensure_ascii=False, indent=2))
+    else:
+        report_perf_findings(payload)
+
+    if fail_on == 'none':
+        return False
+    threshold = SEVERITY_ORDER[fail_on]
+    return any(SEVERITY_ORDER[f['severity']] >= threshold for f in findings)
+
+
+# ---------------------------------------------------------------------------
+# 监听模式（--watch）
+# ---------------------------------------------------------------------------
+
+# inotify 事件掩码（见 <sys/inotify.h>）
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_CLOEXEC = 0o2000000
+INOTIFY_EVENT = struct.Struct('iIII')
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+DEBOUNCE_SECONDS = 0.05
+
+
+class InotifyWatcher:
+    """基于 Linux inotify 的目录监听（通过 ctypes 调用 libc，无第三方依赖）"""
+
+    def __init__(self, directories: List[Path]):
+        libc_name = ctypes.util.find_library('c') or 'libc.so.6'
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 失败")
+        self._dirs: Dict[int, Path] = {}
+        for directory in directories:
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(str(directory)), WATCH_MASK)
+            if wd < 0:
+                raise OSError(ctypes.get_errno(), f"无法监听目录: {directory}")
+            self._dirs[wd] = directory
+
+    def wait(self) -> Set[Path]:
+        """阻塞直到有文件事件，合并去抖窗口内的事件后返回变更路径"""
+        changed: Set[Path] = set()
+        timeout = None
+        while True:
+            ready, _, _ = select.select([self._fd], [], [], timeout)
+            if not ready:
+                return changed
+            changed |= self._read_events()
+            # 编辑器保存往往产生多次事件，收到首个事件后进入短暂去抖窗口
+            timeout = DEBOUNCE_SECONDS
+
+    def _read_events(self) -> Set[Path]:
+        changed = set()
+        data = os.read(self._fd, 64 * 1024)
+        offset = 0
+        while offset < len(data):
+            wd, _mask, _cookie, name_len = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+            name = data[offset:offset + name_len].rstrip(b'\0')
+            offset += name_len
+            if wd in self._dirs and name:
+                changed.add(self._dirs[wd] / os.fsdecode(name))
+        return changed
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+class PollingWatcher:
+    """非 Linux 平台的降级方案：按 mtime 轮询"""
+
+    def __init__(self, directories: List[Path], interval: float = 0.5):
+        self._dirs = directories
+        self._interval = interval
+        self._mtimes = self._scan()
+
+    def _scan(self) -> Dict[Path, float]:
+        mtimes = {}
+        for directory in self._dirs:
+            for path in directory.iterdir():
+                try:
+                    mtimes[path] = path.stat().st_mtime
+                except OSError:
+                    continue
+        return mtimes
+
+    def wait(self) -> Set[Path]:
+        while True:
+            time.sleep(self._interval)
+            current = self._scan()
+            changed = {
+                path for path in set(current) | set(self._mtimes)
+                if current.get(path) != self._mtimes.get(path)
+            }
+            self._mtimes = current
+            if changed:
+                return changed
+
+    def close(self) -> None:
+        pass
+
+
+class IncrementalChecker:
+    """
+    常驻内存的检查状态：按文件缓存解析结果，变更时只重新解析该文件，
+    并只重算受影响的类型-约束对
+    """
+
+    def __init__(self, types_dir: Path, setup_sql: Path):
+        self.types_dir = types_dir
+        self.setup_sql = setup_sql
+        # 按文件缓存的联合类型，字典顺序即合并时的覆盖顺序
+        self.ts_by_file: Dict[Path, Dict[str, Tuple[str, Set[str]]]] = {}
+        self.ts_types: Dict[str, Tuple[str, Set[str]]] = {}
+        self.sql_constraints: Dict[str, Tuple[str, Set[str]]] = {}
+        self.pairs_by_type: Dict[str, List[Tuple[str, str, str]]] = {}
+        # { (ts_name, sql_col): (仅在 TS 的值, 仅在 SQL 的值) }
+        self.results: Dict[Tuple[str, str], Tuple[frozenset, frozenset]] = {}
+
+    def load_all(self) -> None:
+        for ts_file in self.types_dir.glob("*.ts"):
+            self.ts_by_file[ts_file] = self._parse_ts_file(ts_file)
+        self.sql_constraints = self._parse_sql()
+        self.ts_types = {}
+        for parsed in self.ts_by_file.values():
+            self.ts_types.update(parsed)
+        for ts_name in self.ts_types:
+            self._recompute_type(ts_name)
+
+    def _parse_ts_file(self, ts_file: Path) -> Dict[str, Tuple[str, Set[str]]]:
+        try:
+            content = ts_file.read_text(encoding='utf-8')
+        except OSError:
+            return {}
+        return parse_ts_union_types(content, str(ts_file))
+
+    def _parse_sql(self) -> Dict[str, Tuple[str, Set[str]]]:
+        try:
+            content = self.setup_sql.read_text(encoding='utf-8')
+        except OSError:
+            return {}
+        return parse_sql_check_constraints(content)
+
+    def _merged_type(self, ts_name: str) -> Optional[Tuple[str, Set[str]]]:
+        merged = None
+        for parsed in self.ts_by_file.values():
+            if ts_name in parsed:
+                merged = parsed[ts_name]
+        return merged
+
+    def _recompute_type(self, ts_name: str) -> None:
+        for _, sql_col, _ in self.pairs_by_type.pop(ts_name, []):
+            self.results.pop((ts_name, sql_col), None)
+        if ts_name not in self.ts_types:
+            return
+        _, ts_values = self.ts_types[ts_name]
+        pairs = find_pairs_for_type(ts_name, ts_values, self.sql_constraints)
+        self.pairs_by_type[ts_name] = pairs
+        for _, sql_col, _ in pairs:
+            sql_values = self.sql_constraints[sql_col][1]
+            self.results[(ts_name, sql_col)] = (
+                frozenset(ts_values - sql_values),
+                frozenset(sql_values - ts_values),
+            )
+
+    def update_ts_file(self, ts_file: Path) -> Set[str]:
+        """重新解析单个 TS 文件，返回受影响的类型名"""
+        old = self.ts_by_file.get(ts_file, {})
+        new = self._parse_ts_file(ts_file) if ts_file.exists() else {}
+        if ts_file.exists():
+            self.ts_by_file[ts_file] = new
+        else:
+            self.ts_by_file.pop(ts_file, None)
+        affected = set()
+        for ts_name in set(old) | set(new):
+            merged = self._merged_type(ts_name)
+            if merged != self.ts_types.get(ts_name):
+                affected.add(ts_name)
+                if merged is None:
+                    del self.ts_types[ts_name]
+                else:
+                    self.ts_types[ts_name] = merged
+        for ts_name in affected:
+            self._recompute_type(ts_name)
+        return affected
+
+    def update_sql(self) -> Set[str]:
+        """重新解析 setup.sql，只重算涉及变更列的类型，返回受影响的类型名"""
+        old = self.sql_constraints
+        new = self._parse_sql()
+        changed_cols = {col for col in set(old) | set(new) if old.get(col) != new.get(col)}
+        self.sql_constraints = new
+        if not changed_cols:
+            return set()
+
+        affected = set()
+        for ts_name, (_, ts_values) in self.ts_types.items():
+            paired_cols = {sql_col for _, sql_col, _ in self.pairs_by_type.get(ts_name, [])}
+            if (
+                NAME_MAPPINGS.get(ts_name) in changed_cols
+                or paired_cols & changed_cols
+                or any(col in new and values_overlap(ts_values, new[col][1]) for col in changed_cols)
+            ):
+                affected.add(ts_name)
+        for ts_name in affected:
+            self._recompute_type(ts_name)
+        return affected
+
+    def apply_changes(self, paths: Set[Path]) -> Dict[Tuple[str, str], Optional[Tuple[frozenset, frozenset]]]:
+        """处理一批文件变更，返回结果发生变化的对（值为 None 表示该对已消失）"""
+        before = dict(self.results)
+        affected: Set[str] = set()
+        for path in sorted(paths):
+            if path == self.setup_sql:
+                affected |= self.update_sql()
+            elif path.parent == self.types_dir and path.suffix == '.ts':
+                affected |= self.update_ts_file(path)
+
+        changes = {}
+        for key in set(before) | set(self.results):
+            if key[0] in affected and before.get(key) != self.results.get(key):
+                changes[key] = self.results.get(key)
+        return changes
+
+    def has_diff(self) -> bool:
+        return any(only_ts or only_sql for only_ts, only_sql in self.results.values())
+
+
+def create_watcher(directories: List[Path]):
+    if sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(directories)
+        except (OSError, AttributeError) as e:
+            print(f"{Colors.YELLOW}inotify 不可用（{e}），降级为轮询模式{Colors.NC}")
+    return PollingWatcher(directories)
+
+
+def watch(types_dir: Path, setup_sql: Path) -> None:
+    """监听 types 目录与 setup.sql，文件变更后增量重检并输出变化的结果"""
+    checker = IncrementalChecker(types_dir, setup_sql)
+    started = time.perf_counter()
+    checker.load_all()
+    pairs = [pair for pairs in checker.pairs_by_type.values() for pair in pairs]
+    compare_and_report(checker.ts_types, checker.sql_constraints, pairs)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(f"{Colors.BLUE}=== 监听中（初次检查 {elapsed_ms:.1f}ms），Ctrl+C 退出 ==={Colors.NC}\n")
+
+    watcher = create_watcher([types_dir, setup_sql.parent])
+    try:
+        while True:
+            paths = watcher.wait()
+            started = time.perf_counter()
+            changes = checker.apply_changes(paths)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if not changes:
+                continue
+
+            stamp = time.strftime('%H:%M:%S')
+            print(f"{Colors.BLUE}--- {stamp} 变更 {len(changes)} 项（{elapsed_ms:.1f}ms）---{Colors.NC}")
+            for (ts_name, sql_col), result in sorted(changes.items()):
+                if result is None:
+                    print(f"{Colors.YELLOW}[{ts_name}] ↔ [{sql_col}] 已不再关联{Colors.NC}\n")
+                    continue
+                report_pair(checker.ts_types, checker.sql_constraints, ts_name, sql_col)
+            status = f"{Colors.RED}❌ 存在不一致" if checker.has_diff() else f"{Colors.GREEN}✅ 全部一致"
+            print(f"{status}{Colors.NC}\n")
+    except KeyboardInterrupt:
+        print("\n已退出监听")
+    finally:
+        watcher.close()
+
+
+def run_check(tree: Optional[RepoTree] = None) -> bool:
+    """执行一次完整检查并输出报告，返回是否有差异；路径缺失时抛出 RuntimeError"""
+    types_dir, setup_sql = resolve_paths()
+    
+    print(f"项目根目录: {find_project_root()}")
     print(f"TypeScript 类型: {types_dir}")
     print(f"SQL 文件: {setup_sql}")
     
     # 提取数据
-    ts_types = extract_ts_union_types(types_dir)
-    sql_constraints = extract_sql_check_constraints(setup_sql)
+    ts_types = extract_ts_union_types(types_dir, tree)
+    sql_constraints = extract_sql_check_constraints(setup_sql, tree)
     
     print(f"\n找到 {len(ts_types)} 个 TypeScript 联合类型")
     print(f"找到 {len(sql_constraints)} 个 SQL CHECK 约束")
@@ -210,10 +821,54 @@ def main():
         print("2. 生成迁移 SQL（参考 references/db-sync-checklist.md）")
         print("3. 在 Supabase SQL Editor 执行迁移")
         print("4. 重新运行此脚本验证")
-        sys.exit(1)
     else:
         print(f"{Colors.GREEN}=== ✅ 所有检查通过 ==={Colors.NC}")
+    return has_diff
+
+
+def main():
+    parser = argparse.ArgumentParser(description="对比 TypeScript 联合类型与 SQL CHECK 约束")
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="监听 types 目录与 setup.sql，文件变更后增量重检",
+    )
+    parser.add_argument(
+        "--perf-lint",
+        action="store_true",
+        help="检查 setup.sql 中 RLS 策略的逐行函数调用、未建索引的策略列与外键",
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="以 JSON 输出性能检查结果（配合 --perf-lint）",
+    )
+    parser.add_argument(
+        "--fail-on",
+        choices=["warning", "error", "none"],
+        default="warning",
+        help="性能检查达到该严重级别时以退出码 1 结束（默认 warning）",
+    )
+    args = parser.parse_args()
+
+    try:
+        types_dir, setup_sql = resolve_paths()
+    except RuntimeError as e:
+        print(f"{Colors.RED}错误: {e}{Colors.NC}")
+        sys.exit(1)
+    
+    if args.perf_lint:
+        failed = run_perf_lint(as_json=args.json, fail_on=args.fail_on)
+        sys.exit(1 if failed else 0)
+    
+    if args.watch:
+        print(f"TypeScript 类型: {types_dir}")
+        print(f"SQL 文件: {setup_sql}")
+        watch(types_dir, setup_sql)
         sys.exit(0)
+    
+    has_diff = run_check()
+    sys.exit(1 if has_diff else 0)
 
 
 if __name__ == "__main__":
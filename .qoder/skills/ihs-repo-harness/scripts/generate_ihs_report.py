@@ -9,18 +9,44 @@ Markdown report to IHS.md.
 from __future__ import annotations
 
 import argparse
+import gzip
+import hashlib
 import json
+import os
+import random
 import re
+import signal
+import statistics
 import subprocess
+import sys
+import threading
 import time
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass, field, fields, replace
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Iterable
 
+from harness_core import (
+    CACHE_DIR,
+    REPO_ROOT,
+    DeadlineExceeded,
+    GitObjectReader,
+    Phase,
+    RepoTree,
+    SqlSchema,
+    load_cache_json,
+    parse_sql_schema,
+    plan_phases,
+    remaining_seconds,
+    run_phases,
+    save_cache_json,
+    track_process_group,
+    untrack_process_group,
+)
+
 
-REPO_ROOT = Path(__file__).resolve().parents[4]
 APP_ROOT = REPO_ROOT / "app"
+SETUP_SQL_PATH = "app/supabase/setup.sql"
 
 TRACKED_DOC_FILES = [
     "AGENTS.md",
@@ -41,6 +67,197 @@ DEBT_RE = re.compile(r"\b(?:TODO|FIXME|HACK|XXX)\b")
 ANY_RE = re.compile(r"\bany\b")
 TS_IGNORE_RE = re.compile(r"@ts-ignore|@ts-nocheck")
 ESLINT_DISABLE_RE = re.compile(r"eslint-disable")
+REPORT_PAYLOAD_RE = re.compile(r"```json\n(.*?)\n```", re.S)
+
+# Supabase query-builder chains: `<client>.from('table')` followed by chained calls.
+QUERY_FROM_RE = re.compile(r"(?<![\w$])(\w+)\s*\.from\(\s*(['\"`])(\w+)\2\s*\)")
+QUERY_CALL_RE = re.compile(r"\s*\.(\w+)\s*(?:<[^<>()]*>)?\s*\(")
+QUERY_STRING_RE = re.compile(r"(['\"`])((?:\\.|(?!\1).)*)\1")
+QUERY_MATCH_KEY_RE = re.compile(r"(\w+)\s*:")
+QUERY_HEAD_RE = re.compile(r"\bhead\s*:\s*true\b")
+# `supabase.storage.from(bucket)` addresses a bucket, not a table.
+QUERY_NON_TABLE_RECEIVERS = {"storage", "Array"}
+QUERY_OPERATIONS = ("select", "insert", "update", "upsert", "delete")
+QUERY_BOUND_METHODS = {"limit", "range", "single", "maybeSingle"}
+QUERY_FILTER_METHODS = {
+    "eq", "neq", "gt", "gte", "lt", "lte", "like", "ilike", "is", "in",
+    "contains", "containedBy", "overlaps", "textSearch", "filter",
+}
+# Supabase tables key on `id`; assumed for tables setup.sql does not declare.
+QUERY_KEY_COLUMN = "id"
+QUERY_ISSUE_WEIGHTS = {"unindexed_filter": 3, "unbounded": 2, "wildcard_select": 1}
+QUERY_HOTSPOT_LIMIT = 10
+DATA_ACCESS_WEIGHT = 0.1
+
+RUNTIME_CHECK_KEYS = ("type_check", "unit_test", "coverage")
+# Resource regressions are alerted only when both the relative and the
+# absolute growth exceed these, so small commands don't flap on noise.
+RESOURCE_REGRESSION_PCT = 25.0
+RESOURCE_ALERT_FLOORS = {
+    "max_rss_mb": 32.0,
+    "user_cpu_seconds": 1.0,
+    "system_cpu_seconds": 1.0,
+}
+
+# app/tsconfig.json is a solution config ("files": [] plus references), so
+# plain `tsc --noEmit` checks nothing; each referenced project runs on its own.
+TSC_PROJECTS = ("tsconfig.app.json", "tsconfig.node.json")
+TSC_DIAGNOSTIC_RE = re.compile(r"^([A-Za-z][\w /.-]*?):\s+([\d.]+)([sK]?)\s*$", re.M)
+# `tsc --extendedDiagnostics` label -> payload key.
+TSC_DIAGNOSTIC_FIELDS = {
+    "Files": "files",
+    "Lines of TypeScript": "lines_typescript",
+    "Symbols": "symbols",
+    "Types": "types",
+    "Instantiations": "instantiations",
+    "Memory used": "memory_used_mb",
+    "Parse time": "parse_time_seconds",
+    "Bind time": "bind_time_seconds",
+    "Check time": "check_time_seconds",
+    "Total time": "total_time_seconds",
+}
+TSC_REGRESSION_PCT = 20.0
+TSC_ALERT_FLOORS = {
+    "check_time_seconds": 0.5,
+    "memory_used_mb": 32.0,
+    "types": 1000,
+    "instantiations": 5000,
+}
+
+VITEST_JSON_REPORT = CACHE_DIR / "vitest-report.json"
+TEST_HISTORY_CACHE = "test-durations.json"
+TEST_HISTORY_LIMIT = 10
+# Tests faster than this (ms) are ignored by slow-down detection: too noisy.
+TEST_SLOWDOWN_FLOOR_MS = 20
+TEST_SPEED_WEIGHT = 0.15
+
+# --bundle-check: `vite build` into the cache so app/dist is left alone.
+BUNDLE_OUT_DIR = CACHE_DIR / "vite-dist"
+BUNDLE_HISTORY_CACHE = "bundle-sizes.json"
+# v2 keys chunks by manifest entry instead of hash-stripped file name.
+BUNDLE_HISTORY_VERSION = 2
+# Written by `vite build --manifest` (Vite 5+; older versions use the out dir root).
+BUNDLE_MANIFEST_PATHS = (".vite/manifest.json", "manifest.json")
+BUNDLE_ASSET_EXTS = {".js", ".css"}
+# Vite appends an 8-character content hash: `react-vendor-B1x9_aZq.js`.
+BUNDLE_HASH_RE = re.compile(r"-[\w-]{8}(?=\.\w+$)")
+BUNDLE_CHUNK_LIMIT_RE = re.compile(r"chunkSizeWarningLimit:\s*(\d+)")
+VITE_DEFAULT_CHUNK_LIMIT_KB = 500
+BUNDLE_ALERT_FLOORS = {"gzip_bytes": 1024, "raw_bytes": 4096}
+BUNDLE_WEIGHT = 0.1
+# Python has no stdlib brotli; node (needed for the build anyway) does.
+BROTLI_SIZES_JS = (
+    "const fs = require('fs'), zlib = require('zlib');"
+    "const q = {[zlib.constants.BROTLI_PARAM_QUALITY]: 11};"
+    "const out = {};"
+    "for (const f of process.argv.slice(1)) "
+    "out[f] = zlib.brotliCompressSync(fs.readFileSync(f), {params: q}).length;"
+    "console.log(JSON.stringify(out));"
+)
+
+# Debt-age index: blame results per file, reused while the file's blob is
+# unchanged and per marker line while its content hash is unchanged.
+DEBT_INDEX_CACHE = "debt-index.json"
+DEBT_INDEX_VERSION = 1
+BLAME_HEADER_RE = re.compile(r"^([0-9a-f]{40}) \d+ (\d+) (\d+)$")
+# (label, inclusive upper bound in days; None = open-ended)
+DEBT_AGE_BUCKETS = (
+    ("≤30 天", 30),
+    ("31-90 天", 90),
+    ("91-180 天", 180),
+    ("181-365 天", 365),
+    ("1-2 年", 730),
+    (">2 年", None),
+)
+DEBT_OLDEST_LIMIT = 10
+
+# --budget planning. Costs are seconds and only used until a measured cost
+# exists in the cache; values are each phase's relative weight in the score.
+PHASE_RESULTS_CACHE = "phase-results.json"
+PHASE_COSTS_CACHE = "phase-costs.json"
+DEFAULT_PHASE_COSTS = {
+    "current_snapshot": 0.5,
+    "previous_revision": 0.05,
+    "previous_snapshot": 1.0,
+    "runtime_checks": 300.0,
+    "doc_alignment": 0.2,
+    "doc_freshness": 0.3,
+    "test_durations": 0.05,
+    "bundle_check": 120.0,
+    "debt_age": 1.0,
+}
+PHASE_VALUES = {
+    "current_snapshot": 40.0,
+    "runtime_checks": 30.0,
+    "doc_alignment": 9.0,
+    "doc_freshness": 5.0,
+    "test_durations": 5.0,
+    "bundle_check": 4.0,
+    "debt_age": 1.0,
+    "previous_snapshot": 5.0,
+    "previous_revision": 0.0,
+}
+DIMENSION_PHASES = {
+    "corrosion": ("current_snapshot",),
+    "testing": ("current_snapshot", "runtime_checks", "test_durations", "bundle_check"),
+    "docs": ("current_snapshot", "doc_alignment", "doc_freshness"),
+    "trend": ("current_snapshot", "previous_snapshot"),
+    "data_access": ("current_snapshot",),
+}
+# Phases that measure the working tree; their cached results are only current
+# while both HEAD and the uncommitted changes match (see worktree_fingerprint).
+WORKTREE_PHASES = {"current_snapshot", "runtime_checks", "test_durations", "bundle_check"}
+# Untracked outputs the harness itself rewrites (coverage from run_runtime_checks).
+WORKTREE_FINGERPRINT_EXCLUDES = ("app/coverage",)
+# Ordered from most to least trustworthy; a dimension takes its worst phase.
+PHASE_STATUS_ORDER = ("fresh", "sampled", "cached", "stale", "estimated")
+PHASE_STATUS_LABELS = {
+    "fresh": "实测",
+    "sampled": "抽样估计",
+    "cached": "缓存（代码未变）",
+    "stale": "缓存（已过期）",
+    "estimated": "默认估计",
+}
+# Time kept back from the budget for scoring and writing the report.
+BUDGET_RESERVE_SECONDS = 0.15
+# Every score depends on the current snapshot, so it runs even past the
+# deadline, reading at least this many source files; an empty snapshot
+# would score as a worst-case repository.
+REQUIRED_PHASES = ("current_snapshot",)
+SNAPSHOT_MIN_SAMPLE = 30
+SAMPLED_METRICS = (
+    "source_loc",
+    "debt_markers",
+    "any_usage",
+    "ts_ignore",
+    "eslint_disable",
+    "large_files",
+    "query_chains",
+    "wildcard_selects",
+    "unbounded_queries",
+    "unindexed_filters",
+)
+
+
+@dataclass
+class ResourceUsage:
+    max_rss_mb: float
+    user_cpu_seconds: float
+    system_cpu_seconds: float
+    voluntary_ctx_switches: int
+    involuntary_ctx_switches: int
+
+    @classmethod
+    def from_rusage(cls, usage: Any) -> ResourceUsage:
+        # ru_maxrss is kilobytes on Linux but bytes on macOS.
+        rss_kb = usage.ru_maxrss / 1024 if sys.platform == "darwin" else usage.ru_maxrss
+        return cls(
+            max_rss_mb=round(rss_kb / 1024, 1),
+            user_cpu_seconds=round(usage.ru_utime, 2),
+            system_cpu_seconds=round(usage.ru_stime, 2),
+            voluntary_ctx_switches=usage.ru_nvcsw,
+            involuntary_ctx_switches=usage.ru_nivcsw,
+        )
 
 
 @dataclass
@@ -52,6 +269,7 @@ class CommandResult:
     duration_seconds: float
     stdout: str
     stderr: str
+    resources: ResourceUsage | None = None
 
     @property
     def status(self) -> str:
@@ -69,10 +287,19 @@ class SnapshotMetrics:
     eslint_disable: int = 0
     large_files: int = 0
     doc_files_present: int = 0
+    query_chains: int = 0
+    wildcard_selects: int = 0
+    unbounded_queries: int = 0
+    unindexed_filters: int = 0
+    # Chain count per table, and the chains with at least one issue.
+    query_tables: dict[str, int] = field(default_factory=dict)
+    query_findings: list[dict[str, Any]] = field(default_factory=list)
+    # Set when content metrics were estimated from a sample (see --budget).
+    sampling: dict[str, Any] | None = None
 
 
 def run_command(
-    cmd: list[str], cwd: Path, timeout_seconds: int = 1800
+    cmd: list[str], cwd: Path, timeout_seconds: float | None = 1800
 ) -> CommandResult:
     started = time.time()
     proc = subprocess.run(
@@ -95,6 +322,95 @@ def run_command(
     )
 
 
+def run_measured_command(
+    cmd: list[str], cwd: Path, timeout_seconds: float | None = 1800
+) -> CommandResult:
+    """
+    Like `run_command`, but reaps the child with `os.wait4` to record its
+    resource usage (including descendants it waited for, e.g. npm -> tsc).
+    Per-pid accounting stays correct while other phases run subprocesses
+    concurrently, which a RUSAGE_CHILDREN delta would not.
+
+    The child runs in its own session so a timeout kills the whole process
+    group: npm's `sh`/`tsc`/`vitest` descendants would otherwise keep the
+    output pipes open and the readers blocked until they exit on their own.
+    """
+    if not hasattr(os, "wait4"):
+        return run_command(cmd, cwd, timeout_seconds)
+
+    started = time.time()
+    proc = subprocess.Popen(
+        cmd,
+        cwd=str(cwd),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        errors="replace",
+        start_new_session=True,
+    )
+    track_process_group(proc.pid)
+    streams: dict[str, str] = {}
+
+    def drain(name: str, stream: Any) -> None:
+        streams[name] = stream.read()
+
+    readers = [
+        threading.Thread(target=drain, args=("stdout", proc.stdout), daemon=True),
+        threading.Thread(target=drain, args=("stderr", proc.stderr), daemon=True),
+    ]
+    for reader in readers:
+        reader.start()
+
+    kill_lock = threading.Lock()
+    state = {"reaped": False, "timed_out": False}
+
+    def kill_on_timeout() -> None:
+        with kill_lock:
+            if state["reaped"]:
+                return
+            state["timed_out"] = True
+            try:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+    timer = None
+    if timeout_seconds is not None:
+        timer = threading.Timer(timeout_seconds, kill_on_timeout)
+        timer.daemon = True
+        timer.start()
+    try:
+        _, status, usage = os.wait4(proc.pid, 0)
+    finally:
+        with kill_lock:
+            state["reaped"] = True
+        if timer is not None:
+            timer.cancel()
+        untrack_process_group(proc.pid)
+    # Tell Popen the child is already reaped so it never waits on it again.
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    for reader in readers:
+        reader.join()
+    proc.stdout.close()
+    proc.stderr.close()
+    ended = time.time()
+
+    stdout = streams.get("stdout", "")
+    stderr = streams.get("stderr", "")
+    if state["timed_out"] and timeout_seconds is not None:
+        raise subprocess.TimeoutExpired(cmd, timeout_seconds, output=stdout, stderr=stderr)
+    return CommandResult(
+        name=cmd[0],
+        command=" ".join(cmd),
+        cwd=str(cwd),
+        returncode=proc.returncode,
+        duration_seconds=ended - started,
+        stdout=stdout.strip(),
+        stderr=stderr.strip(),
+        resources=ResourceUsage.from_rusage(usage),
+    )
+
+
 def clamp_score(value: float) -> float:
     if value < 0:
         return 0.0
@@ -133,7 +449,119 @@ def count_non_empty_lines(content: str) -> int:
     return sum(1 for line in content.splitlines() if line.strip())
 
 
-def update_metrics_from_text(metrics: SnapshotMetrics, path: str, text: str) -> None:
+def find_call_end(text: str, open_index: int) -> int:
+    """Index of the `)` closing the call opened at `open_index`, skipping JS strings."""
+    depth = 0
+    quote = None
+    index = open_index
+    while index < len(text):
+        char = text[index]
+        if quote:
+            if char == "\\":
+                index += 1
+            elif char == quote:
+                quote = None
+        elif char in "'\"`":
+            quote = char
+        elif char in "([{":
+            depth += 1
+        elif char in ")]}":
+            depth -= 1
+            if depth == 0:
+                return index
+        index += 1
+    return len(text)
+
+
+def first_string_arg(args: str) -> str | None:
+    match = QUERY_STRING_RE.match(args.strip())
+    return match.group(2) if match else None
+
+
+def analyze_query_chains(text: str, schema: SqlSchema | None = None) -> list[dict[str, Any]]:
+    """
+    Find Supabase query-builder chains and classify each one.
+
+    Reads are flagged for wildcard selects and for returning an unbounded
+    result set (no limit/range/single and no filter on a key column). Any
+    chain filtering a table declared in setup.sql is cross-checked against
+    its indexes: it is flagged when none of the filtered columns leads an
+    index. Without a `schema` the index cross-check is skipped.
+    """
+    chains = []
+    for match in QUERY_FROM_RE.finditer(text):
+        if match.group(1) in QUERY_NON_TABLE_RECEIVERS:
+            continue
+        table = match.group(3)
+        calls: list[tuple[str, str]] = []
+        position = match.end()
+        while True:
+            call = QUERY_CALL_RE.match(text, position)
+            if not call:
+                break
+            close_index = find_call_end(text, call.end() - 1)
+            calls.append((call.group(1), text[call.end():close_index]))
+            position = close_index + 1
+
+        methods = [name for name, _ in calls]
+        operation = next((name for name in methods if name in QUERY_OPERATIONS), None)
+        filters: list[str] = []
+        for name, args in calls:
+            if name in QUERY_FILTER_METHODS:
+                column = first_string_arg(args)
+                if column and column not in filters:
+                    filters.append(column)
+            elif name == "match":
+                filters.extend(key for key in QUERY_MATCH_KEY_RE.findall(args) if key not in filters)
+
+        declared = schema is not None and table in schema.tables
+        issues: list[str] = []
+        if operation == "select":
+            args = dict(calls)["select"]
+            columns = first_string_arg(args)
+            returns_rows = not QUERY_HEAD_RE.search(args)
+            if returns_rows and (not args.strip() or (columns is not None and "*" in columns)):
+                issues.append("wildcard_select")
+            if declared:
+                keyed = any(schema.is_unique_column(table, column) for column in filters)
+            else:
+                keyed = QUERY_KEY_COLUMN in filters
+            if returns_rows and not keyed and not QUERY_BOUND_METHODS.intersection(methods):
+                issues.append("unbounded")
+        if declared and filters and not any(
+            schema.leading_index(table, (column,)) for column in filters
+        ):
+            issues.append("unindexed_filter")
+
+        chains.append(
+            {
+                "line": text.count("\n", 0, match.start()) + 1,
+                "table": table,
+                "operation": operation,
+                "filters": filters,
+                "issues": issues,
+            }
+        )
+    return chains
+
+
+def update_query_metrics(
+    metrics: SnapshotMetrics, path: str, text: str, schema: SqlSchema | None
+) -> None:
+    for chain in analyze_query_chains(text, schema):
+        metrics.query_chains += 1
+        metrics.query_tables[chain["table"]] = metrics.query_tables.get(chain["table"], 0) + 1
+        issues = chain["issues"]
+        metrics.wildcard_selects += "wildcard_select" in issues
+        metrics.unbounded_queries += "unbounded" in issues
+        metrics.unindexed_filters += "unindexed_filter" in issues
+        if issues:
+            metrics.query_findings.append({"path": path, **chain})
+
+
+def update_metrics_from_text(
+    metrics: SnapshotMetrics, path: str, text: str, schema: SqlSchema | None = None
+) -> None:
     if is_source_path(path):
         metrics.source_files += 1
         metrics.source_loc += count_non_empty_lines(text)
@@ -143,6 +571,8 @@ def update_metrics_from_text(metrics: SnapshotMetrics, path: str, text: str) ->
         metrics.eslint_disable += len(ESLINT_DISABLE_RE.findall(text))
         if len(text.splitlines()) > 400:
             metrics.large_files += 1
+        if ".from(" in text:
+            update_query_metrics(metrics, path, text, schema)
     elif is_test_path(path):
         if Path(path).suffix in SOURCE_EXTS:
             metrics.test_files += 1
@@ -151,87 +581,338 @@ def update_metrics_from_text(metrics: SnapshotMetrics, path: str, text: str) ->
         metrics.doc_files_present += 1
 
 
-def iter_current_text_files() -> Iterable[tuple[str, str]]:
-    scan_roots = [
-        REPO_ROOT / "app" / "src",
-        REPO_ROOT / "app" / "supabase" / "functions",
-        REPO_ROOT / "app" / "cypress",
-    ]
-    for root in scan_roots:
-        if not root.exists():
-            continue
-        for file_path in root.rglob("*"):
-            if not file_path.is_file():
-                continue
-            path = rel_posix(file_path)
-            if file_path.suffix not in SOURCE_EXTS:
-                continue
-            try:
-                text = file_path.read_text(encoding="utf-8", errors="ignore")
-            except OSError:
+SCAN_ROOTS = ("app/src", "app/supabase/functions", "app/cypress")
+
+
+def iter_current_text_files(tree: RepoTree | None = None) -> Iterable[tuple[str, str]]:
+    tree = tree or RepoTree(REPO_ROOT)
+    for root in SCAN_ROOTS:
+        for file_path in tree.files(REPO_ROOT / root, SOURCE_EXTS):
+            text = tree.read_text(file_path)
+            if text is None:
                 continue
-            yield path, text
+            yield rel_posix(file_path), text
 
     for doc_path in TRACKED_DOC_FILES:
         abs_doc = REPO_ROOT / doc_path
-        if not abs_doc.exists() or not abs_doc.is_file():
+        if not abs_doc.is_file():
             continue
-        try:
-            text = abs_doc.read_text(encoding="utf-8", errors="ignore")
-        except OSError:
-            text = ""
-        yield doc_path, text
+        yield doc_path, tree.read_text(abs_doc) or ""
+
 
+def load_sql_schema(text: str | None) -> SqlSchema | None:
+    return parse_sql_schema(text) if text else None
 
-def collect_current_snapshot() -> SnapshotMetrics:
+
+def collect_current_snapshot(
+    tree: RepoTree | None = None, deadline: float | None = None
+) -> SnapshotMetrics:
+    tree = tree or RepoTree(REPO_ROOT)
+    if deadline is not None:
+        return collect_sampled_snapshot(tree, deadline)
+    schema = load_sql_schema(tree.read_text(REPO_ROOT / SETUP_SQL_PATH))
     metrics = SnapshotMetrics()
-    for path, text in iter_current_text_files():
-        update_metrics_from_text(metrics, path, text)
+    for path, text in iter_current_text_files(tree):
+        update_metrics_from_text(metrics, path, text, schema)
     return metrics
 
 
-def collect_revision_snapshot(revision: str) -> SnapshotMetrics | None:
-    list_res = run_command(
+def merge_query_details(metrics: SnapshotMetrics, sample: SnapshotMetrics) -> None:
+    for table, count in sample.query_tables.items():
+        metrics.query_tables[table] = metrics.query_tables.get(table, 0) + count
+    metrics.query_findings.extend(sample.query_findings)
+
+
+def collect_sampled_snapshot(tree: RepoTree, deadline: float) -> SnapshotMetrics:
+    """
+    Deadline-bounded snapshot. Path-derived counts are exact; source files are
+    read in random order until the deadline (but at least
+    `SNAPSHOT_MIN_SAMPLE`), and if time runs out first the content metrics
+    are extrapolated with 95% confidence intervals.
+    """
+    metrics = SnapshotMetrics()
+    schema = load_sql_schema(tree.read_text(REPO_ROOT / SETUP_SQL_PATH))
+    source_paths: list[tuple[str, Path]] = []
+    for root in SCAN_ROOTS:
+        for file_path in tree.files(REPO_ROOT / root, SOURCE_EXTS):
+            path = rel_posix(file_path)
+            if is_source_path(path):
+                source_paths.append((path, file_path))
+            else:
+                update_metrics_from_text(metrics, path, "")
+    for doc_path in TRACKED_DOC_FILES:
+        if (REPO_ROOT / doc_path).is_file():
+            update_metrics_from_text(metrics, doc_path, "")
+
+    random.Random(0).shuffle(source_paths)
+    samples: list[SnapshotMetrics] = []
+    for path, file_path in source_paths:
+        if len(samples) >= SNAPSHOT_MIN_SAMPLE and time.monotonic() >= deadline:
+            break
+        text = tree.read_text(file_path)
+        if text is None:
+            continue
+        sample = SnapshotMetrics()
+        update_metrics_from_text(sample, path, text, schema)
+        samples.append(sample)
+
+    population = len(source_paths)
+    sampled = len(samples)
+    metrics.source_files = population
+    # Per-table counts and findings cover the files actually read.
+    for sample in samples:
+        merge_query_details(metrics, sample)
+    if sampled == population:
+        for sample in samples:
+            for name in SAMPLED_METRICS:
+                setattr(metrics, name, getattr(metrics, name) + getattr(sample, name))
+        metrics.source_files = sampled
+        return metrics
+    if sampled < 2:
+        raise DeadlineExceeded()
+
+    # Finite population correction: the interval shrinks to 0 as n -> N.
+    fpc = ((population - sampled) / (population - 1)) ** 0.5
+    intervals: dict[str, list[int]] = {}
+    for name in SAMPLED_METRICS:
+        values = [getattr(sample, name) for sample in samples]
+        observed = sum(values)
+        estimate = statistics.mean(values) * population
+        half_width = 1.96 * population * statistics.stdev(values) / sampled**0.5 * fpc
+        setattr(metrics, name, round(estimate))
+        intervals[name] = [
+            max(observed, round(estimate - half_width)),
+            round(estimate + half_width),
+        ]
+    metrics.sampling = {
+        "sampled_files": sampled,
+        "population_files": population,
+        "confidence": 0.95,
+        "intervals": intervals,
+    }
+    return metrics
+
+
+def collect_revision_snapshot(
+    revision: str,
+    git_reader: GitObjectReader | None = None,
+    deadline: float | None = None,
+) -> SnapshotMetrics | None:
+    if git_reader is None:
+        with GitObjectReader(REPO_ROOT) as reader:
+            return collect_revision_snapshot(revision, reader, deadline)
+
+    files = git_reader.list_files(
+        revision,
         [
-            "git",
-            "ls-tree",
-            "-r",
-            "--name-only",
-            revision,
-            "--",
-            "app/src",
-            "app/supabase/functions",
-            "app/cypress",
+            *SCAN_ROOTS,
             "docs",
             "AGENTS.md",
             "README.md",
             "app/README.md",
             "app/supabase/SUPABASE_COOKBOOK.md",
         ],
-        cwd=REPO_ROOT,
-        timeout_seconds=120,
     )
-    if list_res.returncode != 0:
+    if files is None:
         return None
 
-    files = [line.strip() for line in list_res.stdout.splitlines() if line.strip()]
+    schema = load_sql_schema(git_reader.read_text(revision, SETUP_SQL_PATH))
     metrics = SnapshotMetrics()
     for path in files:
         suffix = Path(path).suffix
         if path not in TRACKED_DOC_FILES and suffix not in SOURCE_EXTS:
             continue
-        show_res = run_command(
-            ["git", "show", f"{revision}:{path}"],
-            cwd=REPO_ROOT,
-            timeout_seconds=120,
-        )
-        if show_res.returncode != 0:
+        remaining_seconds(deadline)
+        text = git_reader.read_text(revision, path)
+        if text is None:
             continue
-        update_metrics_from_text(metrics, path, show_res.stdout)
+        update_metrics_from_text(metrics, path, text, schema)
     return metrics
 
 
-def collect_doc_alignment(window_commits: int) -> dict[str, Any]:
+def debt_marker_lines(text: str) -> list[dict[str, Any]]:
+    markers = []
+    for number, line in enumerate(text.splitlines(), start=1):
+        match = DEBT_RE.search(line)
+        if match:
+            stripped = line.strip()
+            markers.append(
+                {
+                    "line": number,
+                    "line_hash": hashlib.sha1(stripped.encode("utf-8")).hexdigest()[:12],
+                    "marker": match.group(0),
+                    "text": stripped[:120],
+                }
+            )
+    return markers
+
+
+def parse_blame_incremental(output: str) -> tuple[dict[int, str], dict[str, int]]:
+    """(commit per final line number, author time per commit) from `git blame --incremental`."""
+    line_commits: dict[int, str] = {}
+    commit_times: dict[str, int] = {}
+    current: tuple[str, int, int] | None = None
+    for line in output.splitlines():
+        header = BLAME_HEADER_RE.match(line)
+        if header:
+            current = (header.group(1), int(header.group(2)), int(header.group(3)))
+            continue
+        if current is None:
+            continue
+        if line.startswith("author-time "):
+            commit_times[current[0]] = int(line.split()[1])
+        elif line.startswith("filename "):
+            # Each group ends with its filename; commit headers appear once per commit.
+            sha, final_line, count = current
+            for offset in range(count):
+                line_commits[final_line + offset] = sha
+            current = None
+    return line_commits, commit_times
+
+
+def blame_marker_lines(
+    revision: str, path: str, markers: list[dict[str, Any]], deadline: float | None
+) -> None:
+    """Fill in `commit`/`time` for `markers`, blaming only their lines."""
+    ranges = [arg for marker in markers for arg in ("-L", f"{marker['line']},{marker['line']}")]
+    res = run_command(
+        ["git", "blame", "--incremental", *ranges, revision, "--", path],
+        cwd=REPO_ROOT,
+        timeout_seconds=remaining_seconds(deadline, 120),
+    )
+    line_commits: dict[int, str] = {}
+    commit_times: dict[str, int] = {}
+    if res.returncode == 0:
+        line_commits, commit_times = parse_blame_incremental(res.stdout)
+    for marker in markers:
+        commit = line_commits.get(marker["line"])
+        marker["commit"] = commit
+        marker["time"] = commit_times.get(commit) if commit else None
+
+
+def summarize_debt_age(
+    files: dict[str, dict[str, Any]],
+    head: str,
+    previous_commit: str | None,
+    reblamed_files: int,
+    blamed_lines: int,
+) -> dict[str, Any]:
+    now = time.time()
+    markers = [
+        {"path": path, **marker} for path, entry in files.items() for marker in entry["markers"]
+    ]
+    dated = [marker for marker in markers if marker.get("time")]
+    ages = [max(0.0, (now - marker["time"]) / 86400) for marker in dated]
+
+    histogram = []
+    lower = -1
+    for label, upper in DEBT_AGE_BUCKETS:
+        count = sum(1 for age in ages if age > lower and (upper is None or age <= upper))
+        histogram.append({"bucket": label, "count": count})
+        lower = upper if upper is not None else lower
+
+    oldest = []
+    for marker in sorted(dated, key=lambda item: item["time"])[:DEBT_OLDEST_LIMIT]:
+        oldest.append(
+            {
+                "path": marker["path"],
+                "line": marker["line"],
+                "marker": marker["marker"],
+                "text": marker["text"],
+                "commit": marker["commit"][:10],
+                "date": datetime.fromtimestamp(marker["time"], timezone.utc).strftime("%Y-%m-%d"),
+                "age_days": int((now - marker["time"]) // 86400),
+            }
+        )
+    return {
+        "indexed_commit": head,
+        "previous_commit": previous_commit,
+        "files_indexed": len(files),
+        "files_reblamed": reblamed_files,
+        "lines_blamed": blamed_lines,
+        "marker_count": len(markers),
+        "undated_markers": len(markers) - len(dated),
+        "median_age_days": round(statistics.median(ages), 1) if ages else None,
+        "histogram": histogram,
+        "oldest": oldest,
+    }
+
+
+def collect_debt_age(
+    git_reader: GitObjectReader, deadline: float | None = None
+) -> dict[str, Any] | None:
+    """
+    Map every debt marker in HEAD to the commit that introduced it.
+
+    Files whose blob is unchanged since the last indexed commit keep their
+    index entry without being read. In changed files, markers whose line
+    content hash was already indexed keep their commit, and `git blame
+    --incremental` runs only for the remaining marker lines.
+    """
+    head_res = run_command(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT)
+    if head_res.returncode != 0:
+        return None
+    head = head_res.stdout.strip()
+    blobs = git_reader.list_blobs(head, SCAN_ROOTS)
+    if blobs is None:
+        return None
+
+    cached = load_cache_json(DEBT_INDEX_CACHE)
+    if not isinstance(cached, dict) or cached.get("version") != DEBT_INDEX_VERSION:
+        cached = {}
+    indexed: dict[str, dict[str, Any]] = cached.get("files") or {}
+    previous_commit = cached.get("commit")
+    by_blob = {entry["blob"]: entry for entry in indexed.values()}
+
+    files: dict[str, dict[str, Any]] = {}
+    reblamed_files = 0
+    blamed_lines = 0
+    try:
+        for path, blob in sorted(blobs.items()):
+            if not is_source_path(path) or Path(path).suffix not in SOURCE_EXTS:
+                continue
+            reused = indexed.get(path) if indexed.get(path, {}).get("blob") == blob else None
+            # Same blob under another path (a rename) carries over as well.
+            reused = reused or by_blob.get(blob)
+            if reused is not None:
+                files[path] = {"blob": blob, "markers": reused["markers"]}
+                continue
+
+            remaining_seconds(deadline)
+            markers = debt_marker_lines(git_reader.read_text(head, path) or "")
+            known = {
+                marker["line_hash"]: marker
+                for marker in (indexed.get(path) or {}).get("markers", [])
+                if marker.get("commit")
+            }
+            unknown = []
+            for marker in markers:
+                previous = known.get(marker["line_hash"])
+                if previous is not None:
+                    marker["commit"], marker["time"] = previous["commit"], previous["time"]
+                else:
+                    unknown.append(marker)
+            if unknown:
+                blame_marker_lines(head, path, unknown, deadline)
+                reblamed_files += 1
+                blamed_lines += len(unknown)
+            files[path] = {"blob": blob, "markers": markers}
+    except DeadlineExceeded:
+        # Keep the progress: entries are keyed by blob, so they stay valid.
+        partial = {**indexed, **files}
+        save_cache_json(
+            DEBT_INDEX_CACHE,
+            {"version": DEBT_INDEX_VERSION, "commit": previous_commit, "files": partial},
+        )
+        raise
+
+    save_cache_json(
+        DEBT_INDEX_CACHE, {"version": DEBT_INDEX_VERSION, "commit": head, "files": files}
+    )
+    return summarize_debt_age(files, head, previous_commit, reblamed_files, blamed_lines)
+
+
+def collect_doc_alignment(window_commits: int, deadline: float | None = None) -> dict[str, Any]:
     log_res = run_command(
         [
             "git",
@@ -241,7 +922,7 @@ def collect_doc_alignment(window_commits: int) -> dict[str, Any]:
             "--pretty=format:__COMMIT__",
         ],
         cwd=REPO_ROOT,
-        timeout_seconds=120,
+        timeout_seconds=remaining_seconds(deadline, 120),
     )
     if log_res.returncode != 0:
         return {"code_commits": 0, "docs_commits": 0, "ratio": 0.0}
@@ -279,7 +960,7 @@ def collect_doc_alignment(window_commits: int) -> dict[str, Any]:
     }
 
 
-def collect_doc_freshness() -> dict[str, Any]:
+def collect_doc_freshness(deadline: float | None = None) -> dict[str, Any]:
     now = datetime.now(timezone.utc)
     detail: dict[str, float] = {}
     fresh_docs = 0
@@ -293,7 +974,7 @@ def collect_doc_freshness() -> dict[str, Any]:
         last_commit_res = run_command(
             ["git", "log", "-1", "--format=%ct", "--", doc],
             cwd=REPO_ROOT,
-            timeout_seconds=30,
+            timeout_seconds=remaining_seconds(deadline, 30),
         )
         if last_commit_res.returncode != 0 or not last_commit_res.stdout.strip():
             continue
@@ -349,7 +1030,53 @@ def parse_coverage_summary() -> dict[str, float] | None:
     return {k: round(v, 2) for k, v in parsed.items() if v is not None}
 
 
-def run_runtime_checks(skip_runtime_checks: bool) -> dict[str, Any]:
+def tsc_build_info(project: str) -> Path:
+    return CACHE_DIR / f"{Path(project).stem}.tsbuildinfo"
+
+
+def merge_command_results(results: list[CommandResult]) -> CommandResult:
+    """Fold several commands run for one check into a single result."""
+    if len(results) == 1:
+        return results[0]
+    usages = [res.resources for res in results if res.resources]
+    resources = None
+    if usages:
+        resources = ResourceUsage(
+            max_rss_mb=max(usage.max_rss_mb for usage in usages),
+            user_cpu_seconds=round(sum(usage.user_cpu_seconds for usage in usages), 2),
+            system_cpu_seconds=round(sum(usage.system_cpu_seconds for usage in usages), 2),
+            voluntary_ctx_switches=sum(usage.voluntary_ctx_switches for usage in usages),
+            involuntary_ctx_switches=sum(usage.involuntary_ctx_switches for usage in usages),
+        )
+    return CommandResult(
+        name=results[0].name,
+        command=" && ".join(res.command for res in results),
+        cwd=results[0].cwd,
+        returncode=next((res.returncode for res in results if res.returncode != 0), 0),
+        duration_seconds=sum(res.duration_seconds for res in results),
+        stdout="\n".join(res.stdout for res in results if res.stdout),
+        stderr="\n".join(res.stderr for res in results if res.stderr),
+        resources=resources,
+    )
+
+
+def merge_tsc_diagnostics(projects: dict[str, dict[str, float] | None]) -> dict[str, float] | None:
+    """Program-wide totals across tsc projects; memory is the peak, not a sum."""
+    merged: dict[str, float] = {}
+    for diagnostics in projects.values():
+        for key, value in (diagnostics or {}).items():
+            if key == "memory_used_mb":
+                merged[key] = max(merged.get(key, 0), value)
+            elif isinstance(value, float):
+                merged[key] = round(merged.get(key, 0) + value, 2)
+            else:
+                merged[key] = merged.get(key, 0) + value
+    return merged or None
+
+
+def run_runtime_checks(
+    skip_runtime_checks: bool, deadline: float | None = None
+) -> dict[str, Any]:
     if skip_runtime_checks:
         return {
             "type_check": {"status": "skipped"},
@@ -362,16 +1089,57 @@ def run_runtime_checks(skip_runtime_checks: bool) -> dict[str, Any]:
     coverage_file = APP_ROOT / "coverage" / "coverage-summary.json"
     if coverage_file.exists():
         coverage_file.unlink()
+    if VITEST_JSON_REPORT.exists():
+        VITEST_JSON_REPORT.unlink()
+    VITEST_JSON_REPORT.parent.mkdir(parents=True, exist_ok=True)
 
+    # Persisted build info lets repeat runs reuse earlier type-check work.
+    build_info_reused = all(tsc_build_info(project).exists() for project in TSC_PROJECTS)
     command_plan = [
-        ("type_check", ["npm", "run", "type-check"]),
-        ("unit_test", ["npm", "run", "test"]),
-        ("coverage", ["npm", "run", "coverage", "--", "--coverage.reporter=json-summary"]),
+        (
+            "type_check",
+            [
+                [
+                    "npx",
+                    "--no-install",
+                    "tsc",
+                    "-p",
+                    project,
+                    "--noEmit",
+                    "--incremental",
+                    "--tsBuildInfoFile",
+                    str(tsc_build_info(project)),
+                    "--extendedDiagnostics",
+                ]
+                for project in TSC_PROJECTS
+            ],
+        ),
+        (
+            "unit_test",
+            [
+                [
+                    "npm",
+                    "run",
+                    "test",
+                    "--",
+                    "--reporter=default",
+                    "--reporter=json",
+                    f"--outputFile.json={VITEST_JSON_REPORT}",
+                ]
+            ],
+        ),
+        ("coverage", [["npm", "run", "coverage", "--", "--coverage.reporter=json-summary"]]),
     ]
 
     result: dict[str, Any] = {"commands": []}
-    for key, cmd in command_plan:
-        cmd_res = run_command(cmd, cwd=APP_ROOT, timeout_seconds=2400)
+    for key, cmds in command_plan:
+        runs = [
+            run_measured_command(
+                cmd, cwd=APP_ROOT, timeout_seconds=remaining_seconds(deadline, 2400)
+            )
+            for cmd in cmds
+        ]
+        cmd_res = merge_command_results(runs)
         result[key] = {
             "status": cmd_res.status,
             "returncode": cmd_res.returncode,
@@ -380,7 +1148,16 @@ def run_runtime_checks(skip_runtime_checks: bool) -> dict[str, Any]:
             "cwd": cmd_res.cwd,
             "stdout_tail": "\n".join(cmd_res.stdout.splitlines()[-20:]),
             "stderr_tail": "\n".join(cmd_res.stderr.splitlines()[-20:]),
+            "resources": asdict(cmd_res.resources) if cmd_res.resources else None,
         }
+        if key == "type_check":
+            result[key]["build_info_reused"] = build_info_reused
+            projects = {
+                project: parse_tsc_diagnostics(run.stdout)
+                for project, run in zip(TSC_PROJECTS, runs)
+            }
+            result[key]["projects"] = projects
+            result[key]["diagnostics"] = merge_tsc_diagnostics(projects)
         result["commands"].append(result[key])
 
     coverage = parse_coverage_summary()
@@ -389,6 +1166,448 @@ def run_runtime_checks(skip_runtime_checks: bool) -> dict[str, Any]:
     return result
 
 
+def parse_vitest_json_report(report_file: Path) -> dict[str, Any] | None:
+    """Per-file and per-test durations (ms) from Vitest's JSON reporter."""
+    try:
+        data = json.loads(report_file.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return None
+
+    files: dict[str, int] = {}
+    tests: dict[str, int] = {}
+    for file_result in data.get("testResults") or []:
+        name = str(file_result.get("name", ""))
+        try:
+            file_key = Path(name).resolve().relative_to(REPO_ROOT).as_posix()
+        except ValueError:
+            file_key = name
+        start, end = file_result.get("startTime"), file_result.get("endTime")
+        if isinstance(start, (int, float)) and isinstance(end, (int, float)):
+            files[file_key] = max(int(end - start), 0)
+        for assertion in file_result.get("assertionResults") or []:
+            duration = assertion.get("duration")
+            if not isinstance(duration, (int, float)):
+                continue
+            title = assertion.get("fullName") or assertion.get("title") or ""
+            tests[f"{file_key} > {title}"] = int(round(duration))
+    if not files and not tests:
+        return None
+    return {"files": files, "tests": tests}
+
+
+def analyze_test_durations(
+    current: dict[str, Any], history: list[dict[str, Any]], threshold_pct: float
+) -> dict[str, Any]:
+    """Compare a run against the median of prior runs in the duration history."""
+    tests: dict[str, int] = current["tests"]
+    files: dict[str, int] = current["files"]
+    total_ms = sum(files.values()) if files else sum(tests.values())
+
+    slowest_tests = sorted(tests.items(), key=lambda item: item[1], reverse=True)[:10]
+    slowest_files = sorted(files.items(), key=lambda item: item[1], reverse=True)[:5]
+
+    regressions: list[dict[str, Any]] = []
+    for test_id, duration in tests.items():
+        previous = [run["tests"][test_id] for run in history if test_id in run.get("tests", {})]
+        if not previous:
+            continue
+        baseline = statistics.median(previous)
+        if duration - baseline < TEST_SLOWDOWN_FLOOR_MS:
+            continue
+        growth_pct = (duration - baseline) / max(baseline, 1) * 100
+        if growth_pct > threshold_pct:
+            regressions.append(
+                {
+                    "test": test_id,
+                    "baseline_ms": round(baseline),
+                    "current_ms": duration,
+                    "growth_pct": round(growth_pct, 1),
+                }
+            )
+    regressions.sort(key=lambda item: item["current_ms"] - item["baseline_ms"], reverse=True)
+
+    previous_totals = [run["total_ms"] for run in history if run.get("total_ms")]
+    baseline_total = statistics.median(previous_totals) if previous_totals else None
+    suite_growth_pct = (
+        round((total_ms - baseline_total) / baseline_total * 100, 1)
+        if baseline_total
+        else None
+    )
+
+    speed_score = None
+    if history:
+        compared = sum(
+            1 for test_id in tests if any(test_id in run.get("tests", {}) for run in history)
+        )
+        regressed_share = len(regressions) / compared if compared else 0.0
+        penalty = min(60.0, regressed_share * 200) + min(40.0, max(0.0, suite_growth_pct or 0) * 0.5)
+        speed_score = clamp_score(100 - penalty)
+
+    return {
+        "total_ms": total_ms,
+        "file_count": len(files),
+        "test_count": len(tests),
+        "baseline_runs": len(history),
+        "baseline_total_ms": round(baseline_total) if baseline_total else None,
+        "suite_growth_pct": suite_growth_pct,
+        "threshold_pct": threshold_pct,
+        "slowest_tests": [{"test": t, "duration_ms": d} for t, d in slowest_tests],
+        "slowest_files": [{"file": f, "duration_ms": d} for f, d in slowest_files],
+        "regressions": regressions[:20],
+        "regression_count": len(regressions),
+        "speed_score": speed_score,
+    }
+
+
+def collect_test_durations(runtime: dict[str, Any], threshold_pct: float) -> dict[str, Any] | None:
+    """Ingest this run's Vitest durations, analyze them and append to the history."""
+    if runtime.get("unit_test", {}).get("status") in (None, "skipped"):
+        return None
+    current = parse_vitest_json_report(VITEST_JSON_REPORT)
+    if current is None:
+        return None
+
+    cached = load_cache_json(TEST_HISTORY_CACHE)
+    history: list[dict[str, Any]] = cached.get("runs", []) if isinstance(cached, dict) else []
+    analysis = analyze_test_durations(current, history, threshold_pct)
+
+    commit_res = run_command(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT)
+    history.append(
+        {
+            "commit": commit_res.stdout.strip() if commit_res.returncode == 0 else None,
+            "recorded_at": int(time.time()),
+            "total_ms": analysis["total_ms"],
+            "files": current["files"],
+            "tests": current["tests"],
+        }
+    )
+    save_cache_json(TEST_HISTORY_CACHE, {"runs": history[-TEST_HISTORY_LIMIT:]})
+    return analysis
+
+
+def unique_chunk_key(key: str, taken: set[str]) -> str:
+    candidate, n = key, 2
+    while candidate in taken:
+        candidate, n = f"{key}~{n}", n + 1
+    taken.add(candidate)
+    return candidate
+
+
+def bundle_chunk_keys(out_dir: Path, paths: list[Path]) -> dict[Path, str]:
+    """
+    Stable key per emitted file. Entry and dynamic-import chunks use their
+    facade module id from Vite's build manifest (e.g. `src/main.tsx`), shared
+    chunks their chunk name, CSS the owning chunk's key. Files the manifest
+    does not list fall back to the file name without its content hash.
+    Distinct files never share a key, so sizes are never merged.
+    """
+    manifest: dict[str, Any] = {}
+    for rel in BUNDLE_MANIFEST_PATHS:
+        try:
+            manifest = json.loads((out_dir / rel).read_text(encoding="utf-8"))
+            break
+        except (OSError, json.JSONDecodeError):
+            continue
+
+    keys: dict[Path, str] = {}
+    taken: set[str] = set()
+    for key, entry in sorted(manifest.items()):
+        if not isinstance(entry, dict) or not entry.get("file"):
+            continue
+        # Chunks without a facade module are keyed "_<file name with hash>".
+        base = f"{entry.get('name') or 'chunk'} (shared)" if key.startswith("_") else key
+        keys.setdefault(out_dir / entry["file"], unique_chunk_key(base, taken))
+        for css in entry.get("css") or []:
+            keys.setdefault(out_dir / css, unique_chunk_key(f"{base} (css)", taken))
+    for path in paths:
+        if path not in keys:
+            name = BUNDLE_HASH_RE.sub("", path.relative_to(out_dir).as_posix())
+            keys[path] = unique_chunk_key(name, taken)
+    return keys
+
+
+def brotli_sizes(paths: list[Path], deadline: float | None = None) -> dict[str, int] | None:
+    if not paths:
+        return {}
+    try:
+        # Measured (and process-group tracked) so the --budget deadline can stop it.
+        res = run_measured_command(
+            ["node", "-e", BROTLI_SIZES_JS, *map(str, paths)],
+            cwd=APP_ROOT,
+            timeout_seconds=remaining_seconds(deadline, 300),
+        )
+    except OSError:
+        return None
+    except subprocess.TimeoutExpired:
+        if deadline is not None:
+            raise
+        return None
+    if res.returncode != 0:
+        return None
+    try:
+        return json.loads(res.stdout)
+    except json.JSONDecodeError:
+        return None
+
+
+def measure_bundle_chunks(
+    out_dir: Path, deadline: float | None = None
+) -> dict[str, dict[str, Any]]:
+    """Raw, gzip and brotli bytes per emitted file, keyed by `bundle_chunk_keys`."""
+    assets_dir = out_dir / "assets"
+    if not assets_dir.is_dir():
+        return {}
+    paths = sorted(
+        path for path in assets_dir.rglob("*") if path.is_file() and path.suffix in BUNDLE_ASSET_EXTS
+    )
+    keys = bundle_chunk_keys(out_dir, paths)
+    brotli = brotli_sizes(paths, deadline)
+    chunks: dict[str, dict[str, Any]] = {}
+    for path in paths:
+        data = path.read_bytes()
+        chunks[keys[path]] = {
+            "file": path.relative_to(out_dir).as_posix(),
+            "raw_bytes": len(data),
+            "gzip_bytes": len(gzip.compress(data, compresslevel=9)),
+            "brotli_bytes": brotli.get(str(path), 0) if brotli is not None else None,
+        }
+    return chunks
+
+
+def vite_chunk_limit_kb() -> int:
+    try:
+        config = (APP_ROOT / "vite.config.ts").read_text(encoding="utf-8")
+    except OSError:
+        return VITE_DEFAULT_CHUNK_LIMIT_KB
+    match = BUNDLE_CHUNK_LIMIT_RE.search(config)
+    return int(match.group(1)) if match else VITE_DEFAULT_CHUNK_LIMIT_KB
+
+
+def bundle_totals(chunks: dict[str, dict[str, Any]]) -> dict[str, Any]:
+    totals: dict[str, Any] = {}
+    for metric in ("raw_bytes", "gzip_bytes", "brotli_bytes"):
+        values = [chunk.get(metric) for chunk in chunks.values()]
+        totals[metric] = None if any(v is None for v in values) else sum(values)
+    return totals
+
+
+def score_bundle(bundle: dict[str, Any]) -> float:
+    if bundle["build"]["status"] != "pass":
+        return 0.0
+    oversized = sum(1 for chunk in bundle["chunks"] if chunk["over_limit"])
+    # One chunk usually trips both the raw and gzip floors; count it once.
+    grown = len({alert["check"] for alert in bundle["alerts"] if alert["check"] != "total"})
+    penalty = (
+        min(45.0, oversized * 15.0)
+        + min(40.0, grown * 10.0)
+        + min(15.0, max(0.0, bundle.get("total_growth_pct") or 0.0) * 0.5)
+    )
+    return clamp_score(100 - penalty)
+
+
+def collect_bundle_metrics(threshold_pct: float, deadline: float | None = None) -> dict[str, Any]:
+    """
+    Run the Vite production build, size every chunk and compare against the
+    last successful build stored in the cache.
+    """
+    cmd = [
+        "npx",
+        "--no-install",
+        "vite",
+        "build",
+        "--outDir",
+        str(BUNDLE_OUT_DIR),
+        "--emptyOutDir",
+        "--manifest",
+    ]
+    cmd_res = run_measured_command(
+        cmd, cwd=APP_ROOT, timeout_seconds=remaining_seconds(deadline, 1800)
+    )
+    build = {
+        "status": cmd_res.status,
+        "returncode": cmd_res.returncode,
+        "duration_seconds": round(cmd_res.duration_seconds, 2),
+        "command": cmd_res.command,
+        "stdout_tail": "\n".join(cmd_res.stdout.splitlines()[-20:]),
+        "stderr_tail": "\n".join(cmd_res.stderr.splitlines()[-20:]),
+        "resources": asdict(cmd_res.resources) if cmd_res.resources else None,
+    }
+    chunk_limit_kb = vite_chunk_limit_kb()
+    bundle: dict[str, Any] = {
+        "build": build,
+        "chunk_limit_kb": chunk_limit_kb,
+        "threshold_pct": threshold_pct,
+        "chunks": [],
+        "totals": None,
+        "baseline": None,
+        "total_growth_pct": None,
+        "alerts": [],
+        "new_chunks": [],
+        "removed_chunks": [],
+    }
+    if cmd_res.status != "pass":
+        bundle["score"] = score_bundle(bundle)
+        return bundle
+
+    chunks = measure_bundle_chunks(BUNDLE_OUT_DIR, deadline)
+    totals = bundle_totals(chunks)
+    bundle["totals"] = totals
+    # Each chunk is a single file, matching how Vite applies chunkSizeWarningLimit.
+    bundle["chunks"] = [
+        {"chunk": name, **sizes, "over_limit": sizes["raw_bytes"] > chunk_limit_kb * 1000}
+        for name, sizes in sorted(chunks.items(), key=lambda item: item[1]["raw_bytes"], reverse=True)
+    ]
+
+    previous = load_cache_json(BUNDLE_HISTORY_CACHE)
+    if (
+        isinstance(previous, dict)
+        and previous.get("version") == BUNDLE_HISTORY_VERSION
+        and isinstance(previous.get("chunks"), dict)
+    ):
+        previous_chunks: dict[str, dict[str, Any]] = previous["chunks"]
+        bundle["baseline"] = {
+            "commit": previous.get("commit"),
+            "recorded_at": previous.get("recorded_at"),
+            "build_seconds": previous.get("build_seconds"),
+        }
+        for name, sizes in chunks.items():
+            if name in previous_chunks:
+                bundle["alerts"].extend(
+                    growth_alerts(name, previous_chunks[name], sizes, BUNDLE_ALERT_FLOORS, threshold_pct)
+                )
+        bundle["new_chunks"] = sorted(set(chunks) - set(previous_chunks))
+        bundle["removed_chunks"] = sorted(set(previous_chunks) - set(chunks))
+        previous_totals = bundle_totals(previous_chunks)
+        bundle["alerts"].extend(
+            growth_alerts("total", previous_totals, totals, BUNDLE_ALERT_FLOORS, threshold_pct)
+        )
+        if previous_totals["gzip_bytes"]:
+            before = previous_totals["gzip_bytes"]
+            bundle["total_growth_pct"] = round((totals["gzip_bytes"] - before) / before * 100, 1)
+    bundle["score"] = score_bundle(bundle)
+
+    commit_res = run_command(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT)
+    save_cache_json(
+        BUNDLE_HISTORY_CACHE,
+        {
+            "version": BUNDLE_HISTORY_VERSION,
+            "commit": commit_res.stdout.strip() if commit_res.returncode == 0 else None,
+            "recorded_at": int(time.time()),
+            "build_seconds": build["duration_seconds"],
+            "chunks": chunks,
+        },
+    )
+    return bundle
+
+
+def load_previous_payload(report_path: Path) -> dict[str, Any] | None:
+    """Read the JSON payload embedded in a previously generated report."""
+    try:
+        text = report_path.read_text(encoding="utf-8")
+    except OSError:
+        return None
+    blocks = REPORT_PAYLOAD_RE.findall(text)
+    if not blocks:
+        return None
+    try:
+        payload = json.loads(blocks[-1])
+    except json.JSONDecodeError:
+        return None
+    return payload if isinstance(payload, dict) else None
+
+
+def parse_tsc_diagnostics(stdout: str) -> dict[str, float] | None:
+    """Pick the tracked counters out of `tsc --extendedDiagnostics` output."""
+    parsed: dict[str, float] = {}
+    for label, value, unit in TSC_DIAGNOSTIC_RE.findall(stdout):
+        key = TSC_DIAGNOSTIC_FIELDS.get(label.strip())
+        if key is None:
+            continue
+        number = float(value)
+        if unit == "K":
+            number = round(number / 1024, 1)
+        parsed[key] = number if unit or "." in value else int(number)
+    return parsed or None
+
+
+def growth_alerts(
+    check: str,
+    previous: dict[str, Any],
+    current: dict[str, Any],
+    floors: dict[str, float],
+    threshold_pct: float,
+) -> list[dict[str, Any]]:
+    alerts: list[dict[str, Any]] = []
+    for metric, floor in floors.items():
+        before = previous.get(metric)
+        after = current.get(metric)
+        if not isinstance(before, (int, float)) or not isinstance(after, (int, float)):
+            continue
+        if before <= 0 or after - before < floor:
+            continue
+        growth_pct = (after - before) / before * 100
+        if growth_pct >= threshold_pct:
+            alerts.append(
+                {
+                    "check": check,
+                    "metric": metric,
+                    "previous": before,
+                    "current": after,
+                    "growth_pct": round(growth_pct, 1),
+                }
+            )
+    return alerts
+
+
+def detect_resource_regressions(
+    runtime: dict[str, Any], previous_payload: dict[str, Any] | None
+) -> list[dict[str, Any]]:
+    if not previous_payload:
+        return []
+    previous_runtime = previous_payload.get("runtime") or {}
+    alerts: list[dict[str, Any]] = []
+    for key in RUNTIME_CHECK_KEYS:
+        current_check = runtime.get(key) or {}
+        previous_check = previous_runtime.get(key) or {}
+        # A changed command (e.g. type_check moving to per-project tsc runs)
+        # measures different work, not a regression.
+        if current_check.get("command") != previous_check.get("command"):
+            continue
+        current = current_check.get("resources")
+        previous = previous_check.get("resources")
+        if not current or not previous:
+            continue
+        alerts.extend(
+            growth_alerts(key, previous, current, RESOURCE_ALERT_FLOORS, RESOURCE_REGRESSION_PCT)
+        )
+    return alerts
+
+
+def detect_tsc_regressions(
+    runtime: dict[str, Any], previous_payload: dict[str, Any] | None
+) -> list[dict[str, Any]]:
+    """Flag type-checking cost growth; warm and cold runs are never compared."""
+    if not previous_payload:
+        return []
+    current = runtime.get("type_check") or {}
+    previous = ((previous_payload.get("runtime") or {}).get("type_check")) or {}
+    if not current.get("diagnostics") or not previous.get("diagnostics"):
+        return []
+    if current.get("build_info_reused") != previous.get("build_info_reused"):
+        return []
+    # Totals over a different set of tsc projects (or the old empty solution
+    # config run) are not comparable.
+    if set(current.get("projects") or ()) != set(previous.get("projects") or ()):
+        return []
+    return growth_alerts(
+        "type_check",
+        previous["diagnostics"],
+        current["diagnostics"],
+        TSC_ALERT_FLOORS,
+        TSC_REGRESSION_PCT,
+    )
+
+
 def score_corrosion(snapshot: SnapshotMetrics) -> float:
     if snapshot.source_files == 0:
         return 0.0
@@ -416,7 +1635,12 @@ def score_test_ratio(snapshot: SnapshotMetrics) -> float:
     return clamp_score(min(100, (ratio / 0.35) * 100))
 
 
-def score_testing(snapshot: SnapshotMetrics, runtime: dict[str, Any]) -> float:
+def score_testing(
+    snapshot: SnapshotMetrics,
+    runtime: dict[str, Any],
+    test_durations: dict[str, Any] | None = None,
+    bundle: dict[str, Any] | None = None,
+) -> float:
     ratio_score = score_test_ratio(snapshot)
 
     status_weights = []
@@ -442,6 +1666,13 @@ def score_testing(snapshot: SnapshotMetrics, runtime: dict[str, Any]) -> float:
         coverage_score = 0
 
     total = 0.4 * ratio_score + 0.35 * runtime_status_score + 0.25 * coverage_score
+    # Test speed only counts once a duration baseline exists.
+    speed_score = (test_durations or {}).get("speed_score")
+    if speed_score is not None:
+        total = (1 - TEST_SPEED_WEIGHT) * total + TEST_SPEED_WEIGHT * speed_score
+    # Bundle size only counts when the optional build check ran.
+    if bundle is not None:
+        total = (1 - BUNDLE_WEIGHT) * total + BUNDLE_WEIGHT * bundle["score"]
     return clamp_score(total)
 
 
@@ -458,6 +1689,60 @@ def score_documentation(
     return clamp_score(total)
 
 
+def score_data_access(snapshot: SnapshotMetrics) -> float | None:
+    if snapshot.query_chains == 0:
+        return None
+    basis = snapshot.query_chains
+    wildcard_pct = (snapshot.wildcard_selects / basis) * 100
+    unbounded_pct = (snapshot.unbounded_queries / basis) * 100
+    unindexed_pct = (snapshot.unindexed_filters / basis) * 100
+
+    penalty = (
+        min(25, wildcard_pct * 0.3)
+        + min(40, unbounded_pct * 0.8)
+        + min(35, unindexed_pct * 1.5)
+    )
+    return clamp_score(100 - penalty)
+
+
+def query_hotspots(findings: list[dict[str, Any]], limit: int) -> list[dict[str, Any]]:
+    """Files ranked by the weighted issues of their query chains."""
+    by_path: dict[str, dict[str, Any]] = {}
+    for finding in findings:
+        entry = by_path.setdefault(
+            finding["path"],
+            {"path": finding["path"], "weight": 0, "chains": 0, "lines": [], "issues": {}},
+        )
+        entry["chains"] += 1
+        entry["lines"].append(finding["line"])
+        for issue in finding["issues"]:
+            entry["weight"] += QUERY_ISSUE_WEIGHTS[issue]
+            entry["issues"][issue] = entry["issues"].get(issue, 0) + 1
+    ranked = sorted(by_path.values(), key=lambda item: (-item["weight"], item["path"]))
+    return ranked[:limit]
+
+
+def build_data_access(
+    snapshot: SnapshotMetrics, schema: SqlSchema | None
+) -> dict[str, Any] | None:
+    score = score_data_access(snapshot)
+    if score is None:
+        return None
+    declared = schema.tables if schema is not None else set()
+    return {
+        "score": score,
+        "query_chains": snapshot.query_chains,
+        "wildcard_selects": snapshot.wildcard_selects,
+        "unbounded_queries": snapshot.unbounded_queries,
+        "unindexed_filters": snapshot.unindexed_filters,
+        "tables": {
+            table: {"chains": count, "declared": table in declared}
+            for table, count in sorted(snapshot.query_tables.items())
+        },
+        "hotspots": query_hotspots(snapshot.query_findings, QUERY_HOTSPOT_LIMIT),
+    }
+
+
 def static_trend_score(snapshot: SnapshotMetrics) -> float:
     corrosion = score_corrosion(snapshot)
     ratio = score_test_ratio(snapshot)
@@ -498,6 +1783,14 @@ def build_markdown_report(
     corrosion_score: float,
     testing_score: float,
     docs_score: float,
+    phase_timings: dict[str, dict[str, float]] | None = None,
+    wall_seconds: float | None = None,
+    test_durations: dict[str, Any] | None = None,
+    budget_info: dict[str, Any] | None = None,
+    started: float | None = None,
+    data_access: dict[str, Any] | None = None,
+    bundle: dict[str, Any] | None = None,
+    debt_age: dict[str, Any] | None = None,
 ) -> str:
     branch_res = run_command(["git", "rev-parse", "--abbrev-ref", "HEAD"], cwd=REPO_ROOT)
     commit_res = run_command(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT)
@@ -539,12 +1832,50 @@ def build_markdown_report(
     else:
         lines.append("- 静态趋势分: 无可用上一提交，当前结果记为基线。")
     lines.append("")
+    # Data access, when measured, takes its weight proportionally from the rest.
+    scale = 1 - DATA_ACCESS_WEIGHT if data_access else 1
     lines.append("| 维度 | 分数 | 权重 |")
     lines.append("| --- | ---: | ---: |")
-    lines.append(f"| 代码腐化度 | {corrosion_score} | 40% |")
-    lines.append(f"| 测试信号 | {testing_score} | 35% |")
-    lines.append(f"| 文档对齐 | {docs_score} | 25% |")
+    lines.append(f"| 代码腐化度 | {corrosion_score} | {round(40 * scale, 1):g}% |")
+    lines.append(f"| 测试信号 | {testing_score} | {round(35 * scale, 1):g}% |")
+    lines.append(f"| 文档对齐 | {docs_score} | {round(25 * scale, 1):g}% |")
+    if data_access:
+        lines.append(
+            f"| 数据访问性能 | {data_access['score']} | {round(DATA_ACCESS_WEIGHT * 100, 1):g}% |"
+        )
     lines.append("")
+    if budget_info:
+        if started is not None:
+            budget_info["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+        lines.append(
+            f"- 预算模式: 预算 `{budget_info['budget_seconds']}s`，"
+            f"实际耗时 `{budget_info.get('elapsed_seconds', '-')}s`；以下为各维度数据来源："
+        )
+        lines.append("")
+        lines.append("| 维度 | 数据状态 |")
+        lines.append("| --- | --- |")
+        for dimension, name in (
+            ("corrosion", "代码腐化度"),
+            ("testing", "测试信号"),
+            ("docs", "文档对齐"),
+            ("data_access", "数据访问性能"),
+            ("trend", "趋势判断"),
+        ):
+            state = budget_info["dimensions"][dimension]
+            lines.append(f"| {name} | {PHASE_STATUS_LABELS[state]} |")
+        lines.append("")
+        if current.sampling:
+            sampling = current.sampling
+            lines.append(
+                f"- 抽样: `{sampling['sampled_files']}/{sampling['population_files']}` 个源码文件，"
+                f"置信水平 {int(sampling['confidence'] * 100)}%"
+            )
+            if budget_info.get("corrosion_interval"):
+                low, high = budget_info["corrosion_interval"]
+                lines.append(f"- 代码腐化度置信区间: `[{low}, {high}]`")
+            for name, (low, high) in sampling["intervals"].items():
+                lines.append(f"- `{name}` 估计 `{getattr(current, name)}`，区间 `[{low}, {high}]`")
+            lines.append("")
     lines.append("## 2) 代码腐化度（Code Entropy）")
     lines.append("")
     lines.append(f"- 源码文件数: `{current.source_files}`")
@@ -555,6 +1886,31 @@ def build_markdown_report(
     lines.append(f"- `eslint-disable` 计数: `{current.eslint_disable}`")
     lines.append(f"- 超大文件（>400 行）: `{current.large_files}`")
     lines.append("")
+    if debt_age:
+        median_age = debt_age["median_age_days"]
+        lines.append(
+            f"- 债务年龄（按 HEAD 的 `git blame`）: 标记 `{debt_age['marker_count']}` 个，"
+            f"年龄中位数 `{median_age if median_age is not None else '-'}` 天；"
+            f"本次重新 blame `{debt_age['files_reblamed']}` 个文件 / `{debt_age['lines_blamed']}` 行"
+            f"（索引 `{debt_age['files_indexed']}` 个文件）"
+        )
+        lines.append("")
+        lines.append("| 年龄 | 标记数 |")
+        lines.append("| --- | ---: |")
+        for bucket in debt_age["histogram"]:
+            lines.append(f"| {bucket['bucket']} | {bucket['count']} |")
+        if debt_age["undated_markers"]:
+            lines.append(f"| 未知 | {debt_age['undated_markers']} |")
+        lines.append("")
+        if debt_age["oldest"]:
+            lines.append("| 最老的债务标记 | 标记 | 引入提交 | 日期 | 年龄(天) |")
+            lines.append("| --- | --- | --- | --- | ---: |")
+            for item in debt_age["oldest"]:
+                lines.append(
+                    f"| `{item['path']}:{item['line']}` | {item['marker']} | `{item['commit']}` "
+                    f"| {item['date']} | {item['age_days']} |"
+                )
+            lines.append("")
     lines.append("## 3) 测试信号（Harness Checks）")
     lines.append("")
     lines.append(f"- 测试文件数: `{current.test_files}`")
@@ -581,6 +1937,133 @@ def build_markdown_report(
         duration = info.get("duration_seconds", "-")
         lines.append(f"| {name} | `{cmd}` | `{status}` | {duration} |")
     lines.append("")
+    resource_rows = [
+        (name, runtime.get(key, {}).get("resources"))
+        for key, name in (
+            ("type_check", "Type Check"),
+            ("unit_test", "Unit Test"),
+            ("coverage", "Coverage"),
+        )
+    ]
+    if any(resources for _, resources in resource_rows):
+        lines.append("| 检查项 | 峰值 RSS(MB) | 用户态 CPU(s) | 内核态 CPU(s) | 上下文切换(自愿/非自愿) |")
+        lines.append("| --- | ---: | ---: | ---: | ---: |")
+        for name, resources in resource_rows:
+            if not resources:
+                continue
+            lines.append(
+                f"| {name} | {resources['max_rss_mb']} | {resources['user_cpu_seconds']} "
+                f"| {resources['system_cpu_seconds']} "
+                f"| {resources['voluntary_ctx_switches']}/{resources['involuntary_ctx_switches']} |"
+            )
+        lines.append("")
+    for alert in runtime.get("resource_alerts") or []:
+        lines.append(
+            f"- ⚠️ 资源回归: `{alert['check']}` 的 `{alert['metric']}` 由 "
+            f"`{alert['previous']}` 增至 `{alert['current']}`（+{alert['growth_pct']}%）"
+        )
+    if runtime.get("resource_alerts"):
+        lines.append("")
+    tsc_info = runtime.get("type_check", {})
+    tsc_diag = tsc_info.get("diagnostics")
+    if tsc_diag:
+        reuse = "复用" if tsc_info.get("build_info_reused") else "新建"
+        lines.append(
+            f"- tsc 诊断（增量构建信息: {reuse}）: 文件 `{tsc_diag.get('files', '-')}`，"
+            f"类型 `{tsc_diag.get('types', '-')}`，实例化 `{tsc_diag.get('instantiations', '-')}`，"
+            f"检查耗时 `{tsc_diag.get('check_time_seconds', '-')}s`，"
+            f"内存 `{tsc_diag.get('memory_used_mb', '-')}MB`"
+        )
+        for alert in runtime.get("tsc_alerts") or []:
+            lines.append(
+                f"- ⚠️ 类型检查成本上升: `{alert['metric']}` 由 `{alert['previous']}` "
+                f"增至 `{alert['current']}`（+{alert['growth_pct']}%）"
+            )
+        lines.append("")
+    if test_durations:
+        lines.append(
+            f"- 单测总耗时: `{test_durations['total_ms']}ms`"
+            f"（{test_durations['file_count']} 个文件 / {test_durations['test_count']} 个用例）"
+        )
+        if test_durations.get("baseline_total_ms") is not None:
+            lines.append(
+                f"- 对比近 {test_durations['baseline_runs']} 次中位数 "
+                f"`{test_durations['baseline_total_ms']}ms`: {test_durations['suite_growth_pct']:+}%"
+                f"，测试速度分 `{test_durations['speed_score']}`"
+            )
+        lines.append("")
+        lines.append("| 最慢测试 | 耗时(ms) |")
+        lines.append("| --- | ---: |")
+        for item in test_durations["slowest_tests"]:
+            lines.append(f"| `{item['test']}` | {item['duration_ms']} |")
+        lines.append("")
+        slowest_files = ", ".join(
+            f"`{item['file']}` ({item['duration_ms']}ms)" for item in test_durations["slowest_files"]
+        )
+        lines.append(f"- 最慢测试文件: {slowest_files or '-'}")
+        lines.append("")
+        if test_durations["regressions"]:
+            lines.append(
+                f"变慢超过 {test_durations['threshold_pct']}% 的测试"
+                f"（共 {test_durations['regression_count']} 个）:"
+            )
+            lines.append("")
+            lines.append("| 测试 | 基线(ms) | 当前(ms) | 增幅 |")
+            lines.append("| --- | ---: | ---: | ---: |")
+            for item in test_durations["regressions"]:
+                lines.append(
+                    f"| `{item['test']}` | {item['baseline_ms']} | {item['current_ms']} "
+                    f"| +{item['growth_pct']}% |"
+                )
+            lines.append("")
+    if bundle:
+        build = bundle["build"]
+        lines.append(
+            f"- 生产构建: `{build['command']}` → `{build['status']}`，"
+            f"耗时 `{build['duration_seconds']}s`"
+        )
+        if build["status"] == "pass":
+            totals = bundle["totals"]
+            brotli_total = totals["brotli_bytes"] if totals["brotli_bytes"] is not None else "-"
+            lines.append(
+                f"- 产物总量: raw `{totals['raw_bytes']}B` / gzip `{totals['gzip_bytes']}B` "
+                f"/ brotli `{brotli_total}B`，产物体积分 `{bundle['score']}`"
+            )
+            baseline = bundle["baseline"]
+            if baseline:
+                growth = bundle["total_growth_pct"]
+                lines.append(
+                    f"- 对比上次构建（`{baseline.get('commit') or '-'}`，"
+                    f"耗时 `{baseline.get('build_seconds', '-')}s`）: gzip 总量 "
+                    + (f"{growth:+}%" if growth is not None else "-")
+                )
+            lines.append("")
+            lines.append(
+                f"| Chunk | 文件 | raw(B) | gzip(B) | brotli(B) | 超过 {bundle['chunk_limit_kb']}kB |"
+            )
+            lines.append("| --- | --- | ---: | ---: | ---: | --- |")
+            for chunk in bundle["chunks"]:
+                brotli_bytes = chunk["brotli_bytes"] if chunk["brotli_bytes"] is not None else "-"
+                lines.append(
+                    f"| `{chunk['chunk']}` | `{chunk['file']}` | {chunk['raw_bytes']} "
+                    f"| {chunk['gzip_bytes']} | {brotli_bytes} | {'⚠️' if chunk['over_limit'] else ''} |"
+                )
+            lines.append("")
+            for alert in bundle["alerts"]:
+                lines.append(
+                    f"- ⚠️ 产物膨胀: `{alert['check']}` 的 `{alert['metric']}` 由 "
+                    f"`{alert['previous']}` 增至 `{alert['current']}`（+{alert['growth_pct']}%）"
+                )
+            if bundle["new_chunks"]:
+                lines.append(f"- 新增 chunk: {', '.join(f'`{c}`' for c in bundle['new_chunks'])}")
+            if bundle["removed_chunks"]:
+                lines.append(
+                    f"- 移除 chunk: {', '.join(f'`{c}`' for c in bundle['removed_chunks'])}"
+                )
+            if bundle["alerts"] or bundle["new_chunks"] or bundle["removed_chunks"]:
+                lines.append("")
+        else:
+            lines.append("")
     lines.append("## 4) 文档对齐（Docs Alignment）")
     lines.append("")
     lines.append(
@@ -593,7 +2076,44 @@ def build_markdown_report(
         f"- 文档新鲜度（<=120 天）: `{doc_freshness.get('fresh_docs', 0)}/{doc_freshness.get('present_docs', 0)}`"
     )
     lines.append("")
-    lines.append("## 5) 技术债结论（变好/变坏）")
+    lines.append("## 5) 数据访问性能（Data Access）")
+    lines.append("")
+    if data_access:
+        undeclared = [
+            table for table, info in data_access["tables"].items() if not info["declared"]
+        ]
+        lines.append(
+            f"- Supabase 查询链: `{data_access['query_chains']}`"
+            f"（涉及 {len(data_access['tables'])} 张表）"
+        )
+        lines.append(f"- 通配查询 `select('*')`: `{data_access['wildcard_selects']}`")
+        lines.append(
+            f"- 无上限的读查询（无 `limit/range/single` 且未按主键/唯一列过滤）: "
+            f"`{data_access['unbounded_queries']}`"
+        )
+        lines.append(f"- 过滤列在 setup.sql 中无索引: `{data_access['unindexed_filters']}`")
+        if undeclared:
+            lines.append(
+                f"- 未在 setup.sql 中声明、无法校验索引的表: "
+                f"{', '.join(f'`{table}`' for table in undeclared)}"
+            )
+        lines.append(f"- 数据访问性能分: `{data_access['score']}`")
+        lines.append("")
+        if data_access["hotspots"]:
+            lines.append("| 热点文件 | 问题查询 | 通配 | 无上限 | 无索引 | 行号 |")
+            lines.append("| --- | ---: | ---: | ---: | ---: | --- |")
+            for item in data_access["hotspots"]:
+                issues = item["issues"]
+                lines.append(
+                    f"| `{item['path']}` | {item['chains']} | {issues.get('wildcard_select', 0)} "
+                    f"| {issues.get('unbounded', 0)} | {issues.get('unindexed_filter', 0)} "
+                    f"| {', '.join(str(line) for line in item['lines'])} |"
+                )
+            lines.append("")
+    else:
+        lines.append("- 未发现 Supabase 查询链。")
+        lines.append("")
+    lines.append("## 6) 技术债结论（变好/变坏）")
     lines.append("")
     lines.append(f"- 最终判断: **{health_good_bad}**")
     lines.append(f"- 趋势判断: **{trend}**")
@@ -601,14 +2121,29 @@ def build_markdown_report(
         "- 判定规则: 若总体分 >= 70 则状态为“好”，否则为“坏”；趋势按静态趋势分对比 HEAD~1。"
     )
     lines.append("")
-    lines.append("## 6) 改进优先级（Next Actions）")
+    lines.append("## 7) 改进优先级（Next Actions）")
     lines.append("")
     lines.append("1. 降低 `any` 与 `eslint-disable`：把高风险类型豁免收敛到网关层。")
     lines.append("2. 提升测试/源码比到 >= 0.35，新增测试优先覆盖核心服务与 Agent Tool。")
     lines.append("3. 每次核心代码变更同步更新 `docs/` 与 `AGENTS.md`，把文档对齐率拉高到 >= 0.8。")
     lines.append("4. 维持 type-check + unit-test + coverage 的持续门禁，避免“先上车后补票”。")
+    lines.append("5. 列表查询显式列出字段并加 `limit/range` 分页，过滤列在 `setup.sql` 中补齐索引。")
     lines.append("")
-    lines.append("## 7) 原始数据快照")
+    phase_timings = phase_timings or {}
+    if phase_timings:
+        lines.append("## 8) 阶段耗时（Phase Timing）")
+        lines.append("")
+        busy_seconds = round(sum(t["duration"] for t in phase_timings.values()), 3)
+        lines.append(f"- 总墙钟耗时: `{wall_seconds}s`，各阶段耗时之和: `{busy_seconds}s`")
+        lines.append("")
+        lines.append("| 阶段 | 开始(s) | 结束(s) | 耗时(s) |")
+        lines.append("| --- | ---: | ---: | ---: |")
+        for name, timing in sorted(phase_timings.items(), key=lambda item: item[1]["start"]):
+            lines.append(
+                f"| {name} | {timing['start']} | {timing['end']} | {timing['duration']} |"
+            )
+        lines.append("")
+    lines.append("## 9) 原始数据快照")
     lines.append("")
     payload = {
         "scores": {
@@ -616,6 +2151,7 @@ def build_markdown_report(
             "corrosion": corrosion_score,
             "testing": testing_score,
             "docs": docs_score,
+            "data_access": data_access["score"] if data_access else None,
             "static_current": current_static,
             "static_previous": previous_static,
             "trend_delta": round(delta, 1) if previous is not None else None,
@@ -631,10 +2167,21 @@ def build_markdown_report(
             "eslint_disable": current.eslint_disable,
             "large_files": current.large_files,
             "doc_files_present": current.doc_files_present,
+            "query_chains": current.query_chains,
+            "wildcard_selects": current.wildcard_selects,
+            "unbounded_queries": current.unbounded_queries,
+            "unindexed_filters": current.unindexed_filters,
+            "sampling": current.sampling,
         },
+        "data_access": data_access,
         "doc_alignment": doc_alignment,
         "doc_freshness": doc_freshness,
         "runtime": runtime,
+        "test_durations": test_durations,
+        "bundle": bundle,
+        "debt_age": debt_age,
+        "budget": budget_info,
+        "phases": {"wall_seconds": wall_seconds, "timings": phase_timings},
     }
     lines.append("```json")
     lines.append(json.dumps(payload, ensure_ascii=False, indent=2))
@@ -643,8 +2190,7 @@ def build_markdown_report(
     return "\n".join(lines)
 
 
-def main() -> int:
-    parser = argparse.ArgumentParser(description="Generate IHS health report.")
+def add_arguments(parser: argparse.ArgumentParser) -> None:
     parser.add_argument(
         "--output",
         default="IHS.md",
@@ -661,29 +2207,326 @@ def main() -> int:
         default=40,
         help="Git commit window for docs alignment.",
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=4,
+        help="Max phases to run concurrently (1 = strictly sequential).",
+    )
+    parser.add_argument(
+        "--slow-test-threshold",
+        type=float,
+        default=50.0,
+        help="Flag tests slower than their historical median by more than this percent.",
+    )
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=None,
+        help=(
+            "Deadline in seconds: run the most valuable phases that fit, reuse cached "
+            "results for the rest and sample files for corrosion metrics."
+        ),
+    )
+    parser.add_argument(
+        "--bundle-check",
+        action="store_true",
+        help=(
+            "Also run the Vite production build and track per-chunk bundle sizes "
+            "(runs even with --skip-runtime-checks)."
+        ),
+    )
+    parser.add_argument(
+        "--bundle-growth-threshold",
+        type=float,
+        default=10.0,
+        help="Flag chunks whose size grew by more than this percent since the last build.",
+    )
+
+
+def build_phases(
+    args: argparse.Namespace,
+    tree: RepoTree,
+    git_reader: GitObjectReader,
+    deadline: float | None = None,
+) -> list[Phase]:
+    """Declare the IHS collection phases; independent phases run concurrently."""
+
+    def guarded(fn: Any) -> Any:
+        # Under --budget a subprocess killed at the deadline drops the phase
+        # (falling back to cache) instead of failing the whole run.
+        if deadline is None:
+            return fn
+
+        def run(deps: dict[str, Any]) -> Any:
+            try:
+                return fn(deps)
+            except subprocess.TimeoutExpired as exc:
+                raise DeadlineExceeded() from exc
+
+        return run
+
+    def previous_revision(_: dict[str, Any]) -> bool:
+        res = run_command(
+            ["git", "rev-parse", "--verify", "HEAD~1"],
+            cwd=REPO_ROOT,
+            timeout_seconds=remaining_seconds(deadline, 1800),
+        )
+        return res.returncode == 0
+
+    def previous_snapshot(deps: dict[str, Any]) -> SnapshotMetrics | None:
+        if not deps["previous_revision"]:
+            return None
+        return collect_revision_snapshot("HEAD~1", git_reader, deadline)
+
+    phases = [
+        Phase("current_snapshot", guarded(lambda _: collect_current_snapshot(tree, deadline))),
+        Phase("previous_revision", guarded(previous_revision)),
+        Phase("previous_snapshot", guarded(previous_snapshot), deps=("previous_revision",)),
+        Phase(
+            "runtime_checks",
+            guarded(lambda _: run_runtime_checks(args.skip_runtime_checks, deadline)),
+        ),
+        Phase(
+            "doc_alignment",
+            guarded(lambda _: collect_doc_alignment(max(args.history_window, 1), deadline)),
+        ),
+        Phase("doc_freshness", guarded(lambda _: collect_doc_freshness(deadline))),
+        Phase("debt_age", guarded(lambda _: collect_debt_age(git_reader, deadline))),
+        Phase(
+            "test_durations",
+            guarded(
+                lambda deps: collect_test_durations(deps["runtime_checks"], args.slow_test_threshold)
+            ),
+            deps=("runtime_checks",),
+        ),
+    ]
+    if args.bundle_check:
+        # Runs after the npm checks so CPU contention doesn't skew build time;
+        # with --skip-runtime-checks there is nothing to wait for.
+        phases.append(
+            Phase(
+                "bundle_check",
+                guarded(lambda _: collect_bundle_metrics(args.bundle_growth_threshold, deadline)),
+                deps=() if args.skip_runtime_checks else ("runtime_checks",),
+            )
+        )
+    return phases
+
+
+def estimated_phase_result(name: str) -> Any:
+    """Neutral stand-in for a phase that neither ran nor has a cached result."""
+    if name == "current_snapshot":
+        return SnapshotMetrics()
+    if name == "previous_revision":
+        return False
+    if name == "runtime_checks":
+        return run_runtime_checks(skip_runtime_checks=True)
+    if name == "doc_alignment":
+        return {"code_commits": 0, "docs_commits": 0, "ratio": 0.5}
+    if name == "doc_freshness":
+        return {"present_docs": 0, "fresh_docs": 0, "fresh_ratio": 0.5, "days_old": {}}
+    return None
+
+
+def encode_phase_result(value: Any) -> Any:
+    return asdict(value) if isinstance(value, SnapshotMetrics) else value
+
+
+def decode_phase_result(name: str, value: Any) -> Any:
+    if name in ("current_snapshot", "previous_snapshot") and isinstance(value, dict):
+        known = {f.name for f in fields(SnapshotMetrics)}
+        return SnapshotMetrics(**{k: v for k, v in value.items() if k in known})
+    return value
+
+
+def worktree_fingerprint(exclude: list[str]) -> str | None:
+    """
+    Hash of the uncommitted state: `git status`, the diff against HEAD, and
+    size/mtime of untracked files. `exclude` keeps the harness's own outputs
+    (e.g. the report) from invalidating every cached result.
+    """
+    pathspecs = ["--", ".", *(f":(exclude){path}" for path in exclude)]
+    status_res = run_command(
+        ["git", "status", "--porcelain=v1", "--untracked-files=all", *pathspecs], cwd=REPO_ROOT
+    )
+    diff_res = run_command(["git", "diff", "HEAD", "--binary", *pathspecs], cwd=REPO_ROOT)
+    if status_res.returncode != 0 or diff_res.returncode != 0:
+        return None
+    digest = hashlib.sha256()
+    digest.update(status_res.stdout.encode("utf-8"))
+    digest.update(diff_res.stdout.encode("utf-8"))
+    for line in status_res.stdout.splitlines():
+        if not line.startswith("?? "):
+            continue
+        try:
+            stat = (REPO_ROOT / line[3:]).stat()
+        except OSError:
+            continue
+        digest.update(f"{line[3:]}:{stat.st_size}:{stat.st_mtime_ns}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def resolve_phase_results(
+    names: list[str], results: dict[str, Any], head: str | None, worktree: str | None
+) -> tuple[dict[str, Any], dict[str, str]]:
+    """Fill phases missing from `results` from the result cache or estimates."""
+    cached = load_cache_json(PHASE_RESULTS_CACHE)
+    cached = cached if isinstance(cached, dict) else {}
+    resolved: dict[str, Any] = {}
+    status: dict[str, str] = {}
+    for name in names:
+        if name in results:
+            resolved[name] = results[name]
+            sampled = isinstance(results[name], SnapshotMetrics) and results[name].sampling
+            status[name] = "sampled" if sampled else "fresh"
+        elif name in cached:
+            entry = cached[name]
+            resolved[name] = decode_phase_result(name, entry.get("result"))
+            current = bool(head) and entry.get("commit") == head
+            if name in WORKTREE_PHASES:
+                current = current and worktree is not None and entry.get("worktree") == worktree
+            status[name] = "cached" if current else "stale"
+        else:
+            resolved[name] = estimated_phase_result(name)
+            status[name] = "estimated"
+    return resolved, status
+
+
+def store_phase_results(
+    args: argparse.Namespace,
+    results: dict[str, Any],
+    status: dict[str, str],
+    timings: dict[str, dict[str, float]],
+    head: str | None,
+    worktree: str | None,
+) -> None:
+    """Remember complete phase results and measured costs for later --budget runs."""
+    cached = load_cache_json(PHASE_RESULTS_CACHE)
+    cached = cached if isinstance(cached, dict) else {}
+    costs = load_cache_json(PHASE_COSTS_CACHE)
+    costs = costs if isinstance(costs, dict) else {}
+    # A skipped runtime check is neither a reusable result nor a real cost.
+    skipped = {"runtime_checks", "test_durations"} if args.skip_runtime_checks else set()
+    now = int(time.time())
+    for name, value in results.items():
+        if status.get(name) != "fresh" or name in skipped:
+            continue
+        cached[name] = {
+            "commit": head,
+            "worktree": worktree,
+            "recorded_at": now,
+            "result": encode_phase_result(value),
+        }
+        duration = timings.get(name, {}).get("duration")
+        if duration is not None:
+            previous_cost = costs.get(name)
+            costs[name] = round(
+                duration if previous_cost is None else 0.5 * previous_cost + 0.5 * duration, 3
+            )
+    save_cache_json(PHASE_RESULTS_CACHE, cached)
+    save_cache_json(PHASE_COSTS_CACHE, costs)
+
+
+def dimension_status(status: dict[str, str]) -> dict[str, str]:
+    return {
+        dimension: max(
+            # Optional phases (e.g. bundle_check) only count when declared.
+            (status[name] for name in names if name in status),
+            key=PHASE_STATUS_ORDER.index,
+            default="estimated",
+        )
+        for dimension, names in DIMENSION_PHASES.items()
+    }
 
+
+def generate_report(
+    args: argparse.Namespace,
+    tree: RepoTree | None = None,
+    git_reader: GitObjectReader | None = None,
+) -> tuple[Path, float]:
+    """Run every IHS phase and write the report; returns (output path, total score)."""
+    tree = tree or RepoTree(REPO_ROOT)
     output = Path(args.output)
     output_path = output if output.is_absolute() else (REPO_ROOT / output)
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    current = collect_current_snapshot()
-
-    prev_sha_res = run_command(["git", "rev-parse", "--verify", "HEAD~1"], cwd=REPO_ROOT)
-    previous: SnapshotMetrics | None = None
-    if prev_sha_res.returncode == 0:
-        previous = collect_revision_snapshot("HEAD~1")
+    if git_reader is None:
+        with GitObjectReader(REPO_ROOT) as reader:
+            return generate_report(args, tree, reader)
+
+    started = time.perf_counter()
+    budget = getattr(args, "budget", None)
+    deadline = None
+    if budget is not None:
+        deadline = time.monotonic() + max(budget - BUDGET_RESERVE_SECONDS, 0.0)
+    previous_payload = load_previous_payload(output_path)
+    head_res = run_command(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT)
+    head = head_res.stdout.strip() if head_res.returncode == 0 else None
+    fingerprint_excludes = list(WORKTREE_FINGERPRINT_EXCLUDES)
+    if output_path.is_relative_to(REPO_ROOT):
+        fingerprint_excludes.append(output_path.relative_to(REPO_ROOT).as_posix())
+    worktree = worktree_fingerprint(fingerprint_excludes)
+
+    phases = build_phases(args, tree, git_reader, deadline)
+    phase_names = [phase.name for phase in phases]
+    if budget is not None:
+        cached_costs = load_cache_json(PHASE_COSTS_CACHE)
+        costs = {**DEFAULT_PHASE_COSTS, **(cached_costs if isinstance(cached_costs, dict) else {})}
+        if args.skip_runtime_checks:
+            # The skipped result is instant and fully determined.
+            costs.update(runtime_checks=0.0, test_durations=0.0)
+        selected = plan_phases(
+            phases,
+            costs,
+            PHASE_VALUES,
+            budget_seconds=max(budget - BUDGET_RESERVE_SECONDS, 0.0),
+            max_workers=max(args.jobs, 1),
+            required=REQUIRED_PHASES,
+        )
+        phases = [phase for phase in phases if phase.name in selected]
 
-    runtime = run_runtime_checks(args.skip_runtime_checks)
-    doc_alignment = collect_doc_alignment(max(args.history_window, 1))
-    doc_freshness = collect_doc_freshness()
+    results, phase_timings = run_phases(
+        phases, max_workers=max(args.jobs, 1), deadline=deadline, required=REQUIRED_PHASES
+    )
+    wall_seconds = round(time.perf_counter() - started, 3)
+    results, phase_status = resolve_phase_results(phase_names, results, head, worktree)
+    store_phase_results(args, results, phase_status, phase_timings, head, worktree)
+
+    current: SnapshotMetrics = results["current_snapshot"]
+    previous: SnapshotMetrics | None = results["previous_snapshot"]
+    runtime: dict[str, Any] = results["runtime_checks"]
+    doc_alignment: dict[str, Any] = results["doc_alignment"]
+    doc_freshness: dict[str, Any] = results["doc_freshness"]
+    test_durations: dict[str, Any] | None = results["test_durations"]
+    bundle: dict[str, Any] | None = results.get("bundle_check")
+    debt_age: dict[str, Any] | None = results["debt_age"]
+    runtime["resource_alerts"] = detect_resource_regressions(runtime, previous_payload)
+    runtime["tsc_alerts"] = detect_tsc_regressions(runtime, previous_payload)
 
     corrosion_score = score_corrosion(current)
-    testing_score = score_testing(current, runtime)
+    testing_score = score_testing(current, runtime, test_durations, bundle)
     docs_score = score_documentation(current, doc_alignment, doc_freshness)
-    overall_score = clamp_score(
-        0.4 * corrosion_score + 0.35 * testing_score + 0.25 * docs_score
+    data_access = build_data_access(
+        current, load_sql_schema(tree.read_text(REPO_ROOT / SETUP_SQL_PATH))
     )
+    overall = 0.4 * corrosion_score + 0.35 * testing_score + 0.25 * docs_score
+    if data_access:
+        overall = (1 - DATA_ACCESS_WEIGHT) * overall + DATA_ACCESS_WEIGHT * data_access["score"]
+    overall_score = clamp_score(overall)
+
+    budget_info: dict[str, Any] | None = None
+    if budget is not None:
+        budget_info = {
+            "budget_seconds": budget,
+            "phases": phase_status,
+            "dimensions": dimension_status(phase_status),
+        }
+        if current.sampling:
+            low = replace(current, **{k: v[0] for k, v in current.sampling["intervals"].items()})
+            high = replace(current, **{k: v[1] for k, v in current.sampling["intervals"].items()})
+            # More debt means a lower score, so the bounds swap.
+            budget_info["corrosion_interval"] = [score_corrosion(high), score_corrosion(low)]
 
     report = build_markdown_report(
         output_path=output_path,
@@ -696,10 +2539,29 @@ def main() -> int:
         corrosion_score=corrosion_score,
         testing_score=testing_score,
         docs_score=docs_score,
+        phase_timings=phase_timings,
+        wall_seconds=wall_seconds,
+        test_durations=test_durations,
+        budget_info=budget_info,
+        started=started,
+        data_access=data_access,
+        bundle=bundle,
+        debt_age=debt_age,
     )
     output_path.write_text(report, encoding="utf-8")
+    return output_path, overall_score
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate IHS health report.")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
 
+    started = time.perf_counter()
+    output_path, overall_score = generate_report(args)
     print(f"IHS report generated: {output_path}")
+    if args.budget is not None:
+        print(f"IHS budget: {args.budget}s, elapsed: {time.perf_counter() - started:.3f}s")
     print(f"IHS total score: {overall_score}")
     return 0
 
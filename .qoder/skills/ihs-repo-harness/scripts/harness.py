@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Single-process harness entry point.
+
+Runs the IHS report and the DB constraint check against one shared `RepoTree`
+and `GitObjectReader`, so CI reads every file once instead of once per script.
+The standalone scripts keep working unchanged.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+import generate_ihs_report
+from harness_core import REPO_ROOT, GitObjectReader, RepoTree
+
+AUTO_DEVELOP_SCRIPTS = Path(__file__).resolve().parents[2] / "auto-develop" / "scripts"
+if str(AUTO_DEVELOP_SCRIPTS) not in sys.path:
+    sys.path.insert(0, str(AUTO_DEVELOP_SCRIPTS))
+
+import db_constraint_diff  # noqa: E402
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Run the IHS report and the DB constraint check in one process."
+    )
+    generate_ihs_report.add_arguments(parser)
+    parser.add_argument(
+        "--skip-constraint-check",
+        action="store_true",
+        help="Skip the TypeScript union vs SQL CHECK constraint diff.",
+    )
+    args = parser.parse_args(argv)
+
+    tree = RepoTree(REPO_ROOT)
+    exit_code = 0
+    with GitObjectReader(REPO_ROOT) as git_reader:
+        output_path, overall_score = generate_ihs_report.generate_report(
+            args, tree=tree, git_reader=git_reader
+        )
+    print(f"IHS report generated: {output_path}")
+    print(f"IHS total score: {overall_score}")
+
+    if not args.skip_constraint_check:
+        try:
+            if db_constraint_diff.run_check(tree):
+                exit_code = 1
+        except RuntimeError as exc:
+            print(f"Constraint check failed: {exc}")
+            exit_code = 1
+
+    print(f"Files read: {tree.cache.reads} (cache hits: {tree.cache.hits})")
+    return exit_code
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
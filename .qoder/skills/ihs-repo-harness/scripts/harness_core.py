@@ -0,0 +1,749 @@
+"""
+Shared core for the repository harness scripts.
+
+`generate_ihs_report.py` and `db_constraint_diff.py` both walk the source tree,
+read files and parse `setup.sql`; when they run in one process (see `harness.py`) they share a
+single `RepoTree` so every directory is walked once and every file is read
+once, and a single `GitObjectReader` so historical blobs come from one
+long-lived `git cat-file --batch` process instead of one `git show` per file.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import queue
+import re
+import signal
+import subprocess
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+
+REPO_ROOT = Path(__file__).resolve().parents[4]
+
+# `photo-wall/` is the pre-rename location of the app and is still accepted.
+APP_DIR_CANDIDATES = ("app", "photo-wall")
+
+# Local state carried between harness runs (histories, indexes); git-ignored.
+CACHE_DIR = REPO_ROOT / ".ihs-cache"
+
+
+def find_app_root(repo_root: Path = REPO_ROOT) -> Path:
+    for name in APP_DIR_CANDIDATES:
+        candidate = repo_root / name
+        if (candidate / "src").is_dir():
+            return candidate
+    raise RuntimeError(f"无法找到应用目录（{' / '.join(APP_DIR_CANDIDATES)}）: {repo_root}")
+
+
+def load_cache_json(name: str) -> Any | None:
+    try:
+        return json.loads((CACHE_DIR / name).read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def save_cache_json(name: str, data: Any) -> None:
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    target = CACHE_DIR / name
+    tmp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(data, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, target)
+
+
+class FileCache:
+    """Text content cache keyed by path, invalidated by mtime and size."""
+
+    def __init__(self) -> None:
+        self._entries: dict[Path, tuple[int, int, str]] = {}
+        self._lock = threading.Lock()
+        self.reads = 0
+        self.hits = 0
+
+    def read_text(self, path: Path) -> str | None:
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+                self.hits += 1
+                return entry[2]
+        try:
+            text = path.read_text(encoding="utf-8", errors="ignore")
+        except OSError:
+            return None
+        with self._lock:
+            self.reads += 1
+            self._entries[path] = (stat.st_mtime_ns, stat.st_size, text)
+        return text
+
+
+class RepoTree:
+    """Memoized directory walker plus a shared `FileCache`."""
+
+    def __init__(self, root: Path = REPO_ROOT) -> None:
+        self.root = root
+        self.cache = FileCache()
+        self._walked: dict[Path, list[Path]] = {}
+        self._lock = threading.Lock()
+
+    def _walk(self, base: Path) -> list[Path]:
+        with self._lock:
+            if base in self._walked:
+                return self._walked[base]
+            for walked_root, files in self._walked.items():
+                if walked_root in base.parents:
+                    return [path for path in files if base in path.parents]
+
+        found: list[Path] = []
+        for dirpath, dirnames, filenames in os.walk(base):
+            dirnames.sort()
+            current = Path(dirpath)
+            found.extend(current / name for name in sorted(filenames))
+        with self._lock:
+            self._walked[base] = found
+        return found
+
+    def files(
+        self,
+        base: Path,
+        suffixes: Iterable[str] | None = None,
+        recursive: bool = True,
+    ) -> list[Path]:
+        if not base.is_dir():
+            return []
+        wanted = set(suffixes) if suffixes is not None else None
+        result = []
+        for path in self._walk(base):
+            if not recursive and path.parent != base:
+                continue
+            if wanted is not None and path.suffix not in wanted:
+                continue
+            result.append(path)
+        return result
+
+    def read_text(self, path: Path) -> str | None:
+        return self.cache.read_text(path)
+
+    def rel_posix(self, path: Path) -> str:
+        return path.relative_to(self.root).as_posix()
+
+
+class GitObjectReader:
+    """Reads revision blobs through one long-lived `git cat-file --batch`."""
+
+    def __init__(self, repo_root: Path = REPO_ROOT) -> None:
+        self.repo_root = repo_root
+        self._proc: subprocess.Popen[bytes] | None = None
+        self._lock = threading.Lock()
+
+    def list_files(self, revision: str, pathspecs: Iterable[str]) -> list[str] | None:
+        proc = subprocess.run(
+            ["git", "ls-tree", "-r", "--name-only", revision, "--", *pathspecs],
+            cwd=str(self.repo_root),
+            capture_output=True,
+            text=True,
+            timeout=120,
+            check=False,
+        )
+        if proc.returncode != 0:
+            return None
+        return [line.strip() for line in proc.stdout.splitlines() if line.strip()]
+
+    def list_blobs(self, revision: str, pathspecs: Iterable[str]) -> dict[str, str] | None:
+        """Blob object id per path at `revision`."""
+        proc = subprocess.run(
+            ["git", "ls-tree", "-r", "-z", revision, "--", *pathspecs],
+            cwd=str(self.repo_root),
+            capture_output=True,
+            text=True,
+            timeout=120,
+            check=False,
+        )
+        if proc.returncode != 0:
+            return None
+        blobs: dict[str, str] = {}
+        for entry in proc.stdout.split("\0"):
+            meta, _, path = entry.partition("\t")
+            parts = meta.split()
+            if len(parts) == 3 and parts[1] == "blob":
+                blobs[path] = parts[2]
+        return blobs
+
+    def _ensure_process(self) -> subprocess.Popen[bytes]:
+        if self._proc is None or self._proc.poll() is not None:
+            self._proc = subprocess.Popen(
+                ["git", "cat-file", "--batch"],
+                cwd=str(self.repo_root),
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        return self._proc
+
+    def read_bytes(self, revision: str, path: str) -> bytes | None:
+        with self._lock:
+            proc = self._ensure_process()
+            assert proc.stdin is not None and proc.stdout is not None
+            proc.stdin.write(f"{revision}:{path}\n".encode("utf-8"))
+            proc.stdin.flush()
+            header = proc.stdout.readline().decode("utf-8", errors="ignore").split()
+            # "<object> missing" / "<object> ambiguous" carry no payload.
+            if len(header) != 3:
+                return None
+            size = int(header[2])
+            data = proc.stdout.read(size)
+            proc.stdout.read(1)
+        if header[1] != "blob":
+            return None
+        return data
+
+    def read_text(self, revision: str, path: str) -> str | None:
+        data = self.read_bytes(revision, path)
+        if data is None:
+            return None
+        return data.decode("utf-8", errors="ignore")
+
+    def close(self) -> None:
+        # A phase abandoned at the --budget deadline may still hold the lock
+        # mid-read; killing the process ends that read instead of waiting.
+        if not self._lock.acquire(timeout=1.0):
+            proc = self._proc
+            if proc is not None:
+                proc.kill()
+            if not self._lock.acquire(timeout=1.0):
+                return
+        try:
+            if self._proc is None:
+                return
+            if self._proc.stdin is not None:
+                self._proc.stdin.close()
+            self._proc.wait()
+            if self._proc.stdout is not None:
+                self._proc.stdout.close()
+            self._proc = None
+        finally:
+            self._lock.release()
+
+    def __enter__(self) -> GitObjectReader:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+@dataclass
+class Phase:
+    """A unit of work in the phase graph; `run` receives the results of `deps`."""
+
+    name: str
+    run: Callable[[dict[str, Any]], Any]
+    deps: tuple[str, ...] = ()
+
+
+def _validate_phases(phases: list[Phase]) -> None:
+    names = [phase.name for phase in phases]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate phase names: {names}")
+    known = set(names)
+    for phase in phases:
+        missing = [dep for dep in phase.deps if dep not in known]
+        if missing:
+            raise ValueError(f"Phase {phase.name!r} depends on unknown phases: {missing}")
+
+    # Kahn's algorithm; anything left over sits on a cycle.
+    indegree = {phase.name: len(phase.deps) for phase in phases}
+    ready = [name for name, count in indegree.items() if count == 0]
+    visited = 0
+    while ready:
+        name = ready.pop()
+        visited += 1
+        for phase in phases:
+            if name in phase.deps:
+                indegree[phase.name] -= 1
+                if indegree[phase.name] == 0:
+                    ready.append(phase.name)
+    if visited != len(phases):
+        cyclic = sorted(name for name, count in indegree.items() if count > 0)
+        raise ValueError(f"Phase graph has a cycle: {cyclic}")
+
+
+class DeadlineExceeded(Exception):
+    """Raised by a phase that cannot finish before the scheduler deadline."""
+
+
+# Process groups of commands started by running phases (see
+# `track_process_group`); `run_phases` kills them when it abandons phases.
+_process_groups: set[int] = set()
+_process_groups_lock = threading.Lock()
+
+
+def track_process_group(pgid: int) -> None:
+    """Register a child started with `start_new_session=True`."""
+    with _process_groups_lock:
+        _process_groups.add(pgid)
+
+
+def untrack_process_group(pgid: int) -> None:
+    with _process_groups_lock:
+        _process_groups.discard(pgid)
+
+
+def kill_process_groups() -> None:
+    """SIGKILL every tracked process group, including grandchildren."""
+    with _process_groups_lock:
+        groups = list(_process_groups)
+        _process_groups.clear()
+    for pgid in groups:
+        try:
+            os.killpg(pgid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+
+def remaining_seconds(deadline: float | None, cap: float | None = None) -> float | None:
+    """Seconds left until `deadline` (a `time.monotonic()` value), capped at `cap`."""
+    if deadline is None:
+        return cap
+    left = deadline - time.monotonic()
+    if left <= 0:
+        raise DeadlineExceeded()
+    return left if cap is None else min(left, cap)
+
+
+def plan_phases(
+    phases: list[Phase],
+    costs: dict[str, float],
+    values: dict[str, float],
+    budget_seconds: float,
+    max_workers: int,
+    required: Iterable[str] = (),
+) -> set[str]:
+    """
+    Pick the phases worth running within `budget_seconds`.
+
+    Phases are ranked by value per estimated second and admitted greedily,
+    together with any dependencies not yet admitted, as long as the chain
+    fits the budget on its own and the total stays within the capacity of
+    `max_workers` parallel lanes. `required` phases are always admitted.
+    """
+    by_name = {phase.name: phase for phase in phases}
+
+    def closure(name: str, acc: set[str]) -> set[str]:
+        if name not in acc:
+            acc.add(name)
+            for dep in by_name[name].deps:
+                closure(dep, acc)
+        return acc
+
+    selected: set[str] = set()
+    for name in required:
+        selected |= closure(name, set())
+    used = sum(costs.get(name, 0.0) for name in selected)
+    capacity = budget_seconds * max(1, max_workers)
+
+    def rank(phase: Phase) -> float:
+        return values.get(phase.name, 0.0) / max(costs.get(phase.name, 0.0), 1e-3)
+
+    for phase in sorted(phases, key=rank, reverse=True):
+        if phase.name in selected or values.get(phase.name, 0.0) <= 0:
+            continue
+        chain = closure(phase.name, set()) - selected
+        chain_cost = sum(costs.get(name, 0.0) for name in chain)
+        if chain_cost <= budget_seconds and used + chain_cost <= capacity:
+            selected |= chain
+            used += chain_cost
+    return selected
+
+
+def run_phases(
+    phases: list[Phase],
+    max_workers: int = 4,
+    deadline: float | None = None,
+    required: Iterable[str] = (),
+) -> tuple[dict[str, Any], dict[str, dict[str, float]]]:
+    """
+    Run `phases` as a dependency graph on up to `max_workers` threads.
+
+    Returns (results by phase name, timings by phase name). Timings are
+    offsets in seconds from scheduler start, so overlapping phases show
+    overlapping [start, end] ranges. The first phase exception is re-raised
+    once the phases already running have finished.
+
+    With a `deadline` (a `time.monotonic()` value) no phase starts after it
+    and the scheduler stops waiting once it passes. Phases that raise
+    `DeadlineExceeded`, are still running at the deadline, or depend on such
+    phases are left out of the results instead of failing the run. Phases
+    run on daemon threads and tracked process groups are killed at the
+    deadline, so abandoned phases never hold up interpreter shutdown.
+
+    `required` phases are the exception: they start and are waited for even
+    after the deadline, so they must bound their own work (e.g. by sampling).
+    """
+    _validate_phases(phases)
+    by_name = {phase.name: phase for phase in phases}
+    results: dict[str, Any] = {}
+    timings: dict[str, dict[str, float]] = {}
+    timings_lock = threading.Lock()
+    pending = dict(by_name)
+    running: set[str] = set()
+    completed: queue.Queue[tuple[str, Any, BaseException | None]] = queue.Queue()
+    dropped: set[str] = set()
+    error: BaseException | None = None
+    workers = max(1, max_workers)
+    must_run = set(required)
+    origin = time.perf_counter()
+
+    def execute(phase: Phase, inputs: dict[str, Any]) -> None:
+        started = time.perf_counter()
+        value: Any = None
+        failure: BaseException | None = None
+        try:
+            value = phase.run(inputs)
+        except BaseException as exc:  # noqa: BLE001 - handed to the scheduler
+            failure = exc
+        ended = time.perf_counter()
+        with timings_lock:
+            timings[phase.name] = {
+                "start": round(started - origin, 3),
+                "end": round(ended - origin, 3),
+                "duration": round(ended - started, 3),
+            }
+        completed.put((phase.name, value, failure))
+
+    while pending or running:
+        expired = deadline is not None and time.monotonic() >= deadline
+        if error is None:
+            for name, phase in list(pending.items()):
+                if name not in must_run and (expired or len(running) >= workers):
+                    continue
+                if any(dep in dropped for dep in phase.deps):
+                    dropped.add(name)
+                    del pending[name]
+                elif all(dep in results for dep in phase.deps):
+                    inputs = {dep: results[dep] for dep in phase.deps}
+                    del pending[name]
+                    running.add(name)
+                    threading.Thread(
+                        target=execute, args=(phase, inputs), name=f"phase-{name}", daemon=True
+                    ).start()
+        if not running:
+            break
+        if deadline is None or running & must_run:
+            timeout = None
+        else:
+            timeout = max(deadline - time.monotonic(), 0)
+        try:
+            name, value, failure = completed.get(timeout=timeout)
+        except queue.Empty:
+            # Deadline passed with phases still running: abandon them and
+            # stop their subprocesses so they cannot outlive the budget.
+            kill_process_groups()
+            break
+        running.discard(name)
+        if failure is None:
+            results[name] = value
+        elif isinstance(failure, DeadlineExceeded):
+            dropped.add(name)
+        elif error is None:
+            error = failure
+    if error is not None:
+        raise error
+    with timings_lock:
+        ordered = dict(sorted(timings.items(), key=lambda item: item[1]["start"]))
+    return results, ordered
+
+
+# ---------------------------------------------------------------------------
+# setup.sql schema parsing, shared by the IHS data-access dimension and the
+# auto-develop `db_constraint_diff.py --perf-lint` checks.
+# ---------------------------------------------------------------------------
+
+# String literals / line comments / block comments; comments are blanked to
+# the same length so offsets (and line numbers) survive.
+SQL_TOKEN_PATTERN = re.compile(r"'(?:[^']|'')*'|--[^\n]*|/\*.*?\*/", re.DOTALL)
+
+SQL_TABLE_NAME = r'((?:"?\w+"?\.)?"?\w+"?)'
+
+CREATE_TABLE_PATTERN = re.compile(
+    r"CREATE\s+(?:UNLOGGED\s+)?TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?" + SQL_TABLE_NAME + r"\s*\(",
+    re.IGNORECASE,
+)
+
+CREATE_INDEX_PATTERN = re.compile(
+    r"CREATE\s+(UNIQUE\s+)?INDEX\s+(?:CONCURRENTLY\s+)?(?:IF\s+NOT\s+EXISTS\s+)?(\w+)?\s*"
+    r"ON\s+(?:ONLY\s+)?" + SQL_TABLE_NAME + r"\s*(?:USING\s+(\w+)\s*)?\(",
+    re.IGNORECASE,
+)
+
+ALTER_TABLE_CONSTRAINT_PATTERN = re.compile(
+    r"ALTER\s+TABLE\s+(?:IF\s+EXISTS\s+)?(?:ONLY\s+)?" + SQL_TABLE_NAME
+    + r"\s+ADD\s+(?:CONSTRAINT\s+\w+\s+)?(PRIMARY\s+KEY|UNIQUE|FOREIGN\s+KEY)\s*\(([^)]*)\)"
+    r"(?:\s*REFERENCES\s+" + SQL_TABLE_NAME + r")?",
+    re.IGNORECASE,
+)
+
+TABLE_CONSTRAINT_PATTERN = re.compile(
+    r"(PRIMARY\s+KEY|UNIQUE|FOREIGN\s+KEY)\s*\(([^)]*)\)(?:\s*REFERENCES\s+" + SQL_TABLE_NAME + ")?",
+    re.IGNORECASE,
+)
+
+CREATE_POLICY_PATTERN = re.compile(
+    r'CREATE\s+POLICY\s+("[^"]+"|\w+)\s+ON\s+' + SQL_TABLE_NAME,
+    re.IGNORECASE,
+)
+
+POLICY_COMMAND_PATTERN = re.compile(r"\bFOR\s+(ALL|SELECT|INSERT|UPDATE|DELETE)\b", re.IGNORECASE)
+POLICY_CLAUSE_PATTERN = re.compile(r"\b(USING|WITH\s+CHECK)\s*\(", re.IGNORECASE)
+
+
+@dataclass
+class SqlIndex:
+    table: str
+    columns: tuple[str | None, ...]  # None for expression columns
+    name: str
+    method: str = "btree"
+    partial: bool = False
+    unique: bool = False  # primary key / UNIQUE constraint / CREATE UNIQUE INDEX
+    line: int = 0
+
+
+@dataclass
+class SqlForeignKey:
+    table: str
+    columns: tuple[str, ...]
+    references: str
+    line: int = 0
+
+
+@dataclass
+class SqlPolicy:
+    name: str
+    table: str
+    command: str
+    # (clause name, expression, offset of the expression in the file)
+    clauses: list[tuple[str, str, int]] = field(default_factory=list)
+    line: int = 0
+
+
+@dataclass
+class SqlSchema:
+    tables: set[str] = field(default_factory=set)
+    indexes: dict[str, list[SqlIndex]] = field(default_factory=dict)
+    foreign_keys: list[SqlForeignKey] = field(default_factory=list)
+    policies: list[SqlPolicy] = field(default_factory=list)
+
+    def add_index(self, index: SqlIndex) -> None:
+        self.indexes.setdefault(index.table, []).append(index)
+
+    def leading_index(self, table: str, columns: tuple[str, ...]) -> SqlIndex | None:
+        """An index led by `columns` (in any order); Postgres seeks on leading columns only."""
+        wanted = set(columns)
+        for index in self.indexes.get(table, []):
+            if set(index.columns[: len(columns)]) == wanted:
+                return index
+        return None
+
+    def is_unique_column(self, table: str, column: str) -> bool:
+        """Whether a single-column unique index covers `column` (equality hits at most one row)."""
+        return any(
+            index.unique and not index.partial and index.columns == (column,)
+            for index in self.indexes.get(table, [])
+        )
+
+
+def mask_sql_comments(content: str) -> str:
+    """Blank out comments (keeping newlines); string literals stay as they are."""
+
+    def replace(match: re.Match[str]) -> str:
+        text = match.group(0)
+        if text.startswith("'"):
+            return text
+        return re.sub(r"[^\n]", " ", text)
+
+    return SQL_TOKEN_PATTERN.sub(replace, content)
+
+
+def normalize_table_name(name: str) -> str:
+    """Drop quotes and the default schema: public.profiles -> profiles."""
+    name = name.replace('"', "").lower()
+    return name[len("public."):] if name.startswith("public.") else name
+
+
+def line_of(content: str, offset: int) -> int:
+    return content.count("\n", 0, offset) + 1
+
+
+def find_closing_paren(text: str, open_index: int) -> int:
+    """Index of the ")" matching the "(" at `open_index`, skipping string literals."""
+    depth = 0
+    in_string = False
+    for i in range(open_index, len(text)):
+        char = text[i]
+        if char == "'":
+            in_string = not in_string
+        elif in_string:
+            continue
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth == 0:
+                return i
+    return len(text)
+
+
+def split_top_level(text: str) -> list[str]:
+    """Split on commas that are not inside parentheses."""
+    parts, depth, start = [], 0, 0
+    for i, char in enumerate(text):
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "," and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return [part.strip() for part in parts if part.strip()]
+
+
+def parse_column_list(text: str) -> tuple[str | None, ...]:
+    columns = []
+    for part in split_top_level(text):
+        match = re.match(r'"?(\w+)"?\s*(?:ASC|DESC|NULLS\b|\w+_ops\b|$)', part, re.IGNORECASE)
+        columns.append(match.group(1).lower() if match else None)
+    return tuple(columns)
+
+
+def parse_table_body(
+    schema: SqlSchema, table: str, content: str, body_start: int, body_end: int
+) -> None:
+    """
+    Column definitions and table constraints of a CREATE TABLE. Primary keys
+    and UNIQUE constraints count as indexes, REFERENCES as foreign keys.
+    """
+    cursor = body_start
+    for element in split_top_level(content[body_start:body_end]):
+        cursor = content.find(element, cursor)
+        line = line_of(content, cursor)
+        element = re.sub(r"^CONSTRAINT\s+\w+\s+", "", element, flags=re.IGNORECASE)
+        table_level = TABLE_CONSTRAINT_PATTERN.match(element)
+        if table_level:
+            kind = table_level.group(1).upper().split()[0]
+            columns = parse_column_list(table_level.group(2))
+            if kind == "FOREIGN":
+                references = normalize_table_name(table_level.group(3) or "")
+                schema.foreign_keys.append(
+                    SqlForeignKey(table, tuple(c for c in columns if c), references, line)
+                )
+            else:
+                schema.add_index(
+                    SqlIndex(table, columns, f"{table}_{kind.lower()}", unique=True, line=line)
+                )
+            continue
+        if re.match(r"(CHECK|EXCLUDE)\b", element, re.IGNORECASE):
+            continue
+
+        column = element.split()[0].replace('"', "").lower()
+        if re.search(r"\bPRIMARY\s+KEY\b", element, re.IGNORECASE):
+            schema.add_index(SqlIndex(table, (column,), f"{table}_pkey", unique=True, line=line))
+        elif re.search(r"\bUNIQUE\b", element, re.IGNORECASE):
+            schema.add_index(
+                SqlIndex(table, (column,), f"{table}_{column}_key", unique=True, line=line)
+            )
+        reference = re.search(r"\bREFERENCES\s+" + SQL_TABLE_NAME, element, re.IGNORECASE)
+        if reference:
+            schema.foreign_keys.append(
+                SqlForeignKey(table, (column,), normalize_table_name(reference.group(1)), line)
+            )
+
+
+def parse_policy(content: str, match: re.Match[str]) -> SqlPolicy:
+    name = match.group(1).strip('"')
+    table = normalize_table_name(match.group(2))
+    end = content.find(";", match.end())
+    end = len(content) if end == -1 else end
+    statement = content[match.end():end]
+
+    command = POLICY_COMMAND_PATTERN.search(statement)
+    policy = SqlPolicy(
+        name,
+        table,
+        command.group(1).upper() if command else "ALL",
+        line=line_of(content, match.start()),
+    )
+    position = 0
+    while True:
+        clause = POLICY_CLAUSE_PATTERN.search(statement, position)
+        if not clause:
+            break
+        open_index = clause.end() - 1
+        close_index = find_closing_paren(statement, open_index)
+        expression_offset = match.end() + open_index + 1
+        clause_name = re.sub(r"\s+", " ", clause.group(1).upper())
+        policy.clauses.append(
+            (clause_name, statement[open_index + 1:close_index], expression_offset)
+        )
+        position = close_index + 1
+    return policy
+
+
+def parse_sql_schema(content: str) -> SqlSchema:
+    """
+    Tables, indexes, foreign keys and RLS policies declared in setup.sql.
+    Primary keys and UNIQUE constraints create indexes implicitly, so they
+    are recorded as indexes too.
+    """
+    content = mask_sql_comments(content)
+    schema = SqlSchema()
+
+    for match in CREATE_TABLE_PATTERN.finditer(content):
+        table = normalize_table_name(match.group(1))
+        open_index = match.end() - 1
+        schema.tables.add(table)
+        parse_table_body(
+            schema, table, content, open_index + 1, find_closing_paren(content, open_index)
+        )
+
+    for match in CREATE_INDEX_PATTERN.finditer(content):
+        open_index = match.end() - 1
+        close_index = find_closing_paren(content, open_index)
+        tail = content[close_index + 1:content.find(";", close_index)]
+        schema.add_index(
+            SqlIndex(
+                table=normalize_table_name(match.group(3)),
+                columns=parse_column_list(content[open_index + 1:close_index]),
+                name=match.group(2) or "",
+                method=(match.group(4) or "btree").lower(),
+                partial=bool(re.search(r"\bWHERE\b", tail, re.IGNORECASE)),
+                unique=bool(match.group(1)),
+                line=line_of(content, match.start()),
+            )
+        )
+
+    for match in ALTER_TABLE_CONSTRAINT_PATTERN.finditer(content):
+        table = normalize_table_name(match.group(1))
+        kind = match.group(2).upper().split()[0]
+        columns = parse_column_list(match.group(3))
+        line = line_of(content, match.start())
+        if kind == "FOREIGN":
+            references = normalize_table_name(match.group(4) or "")
+            schema.foreign_keys.append(
+                SqlForeignKey(table, tuple(c for c in columns if c), references, line)
+            )
+        else:
+            schema.add_index(
+                SqlIndex(table, columns, f"{table}_{kind.lower()}", unique=True, line=line)
+            )
+
+    for match in CREATE_POLICY_PATTERN.finditer(content):
+        schema.policies.append(parse_policy(content, match))
+
+    return schema